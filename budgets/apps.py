@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class BudgetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'budgets'
+
+    def ready(self):
+        from users.signals import track_data_version, owner_of, owner_of_budget_of
+        from .models import Budget, LimitDetail, FutureExpenseDetail
+
+        track_data_version(Budget, owner_of)
+        track_data_version(LimitDetail, owner_of_budget_of)
+        track_data_version(FutureExpenseDetail, owner_of_budget_of)
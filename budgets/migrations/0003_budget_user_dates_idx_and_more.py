@@ -0,0 +1,37 @@
+# Generated by Django 4.0.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+BUDGET_DATES_DO_NOT_OVERLAP = (
+    'ALTER TABLE budgets_budget ADD CONSTRAINT budget_dates_do_not_overlap '
+    "EXCLUDE USING gist (user_id WITH =, daterange(initial_date, final_date, '[]') WITH &&)"
+)
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Range exclusion constraints only exist on Postgres, other databases rely on Budget.save locking
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+        schema_editor.execute(BUDGET_DATES_DO_NOT_OVERLAP)
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE budgets_budget DROP CONSTRAINT IF EXISTS budget_dates_do_not_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_data_version'),
+        ('budgets', '0002_futureexpensedetail_limitdetail_delete_detail_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['user', 'initial_date', 'final_date'], name='budget_user_dates_idx'),
+        ),
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
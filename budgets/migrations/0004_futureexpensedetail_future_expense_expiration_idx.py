@@ -0,0 +1,17 @@
+# Generated by Django 4.0.1 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgets', '0003_budget_user_dates_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='futureexpensedetail',
+            index=models.Index(fields=['expiration_date', 'expended'], name='future_expense_expiration_idx'),
+        ),
+    ]
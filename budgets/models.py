@@ -1,12 +1,14 @@
-from django.db import models
+from django.db import models, transaction, connection, IntegrityError
+from django.db.models import F, Sum
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 
 from users.models import User
+from users.signals import single_data_version_bump
 from categories.models import Category
-from expenses.models import Expense
+from expenses.models import DailySpending
 from datetime import date
-from datetime import datetime
+from datetime import datetime, timedelta
 
 def validate_date_is_not_in_the_past(value):
     today = date.today()
@@ -15,6 +17,9 @@ def validate_date_is_not_in_the_past(value):
 
 # Create your models here.
 class Budget(models.Model):
+    class Meta:
+        indexes = [models.Index(fields=['user', 'initial_date', 'final_date'], name='budget_user_dates_idx')]
+
     id = models.AutoField(primary_key=True)
 
     user = models.ForeignKey(
@@ -50,22 +55,13 @@ class Budget(models.Model):
 
     @property
     def as_dict(self):
-        return {
-            'id': self.id,
-            'initial_date': str(self.initial_date),
-            'final_date': str(self.final_date),
-            'details': [detail.as_dict for detail in Detail.from_budget(self)],
-            'total_limit': float(self.total_limit),
-            'total_spent': float(self.total_spent),
-            'active': self.active,
-            'editable': self.editable,
-            'has_finished': self.has_finished
-        }
+        from budgets.summary import BudgetSummary
+        return BudgetSummary.for_budget(self).as_dict
 
     @property
     def total_spent(self):
-        total = sum([detail.total_spent for detail in LimitDetail.objects.filter(assigned_budget=self)])
-        return total
+        from budgets.summary import BudgetSummary
+        return BudgetSummary.for_budget(self).total_spent
 
     @property
     def editable(self):
@@ -91,12 +87,46 @@ class Budget(models.Model):
         if self.final_date < self.initial_date:
             raise ValidationError("Budget initial date should be earlier than final date.")
 
-        for budget in Budget.all_from_user(self.user):
-            if not (update and budget.id == self.id):
-                if budget.initial_date <= self.final_date <= budget.final_date or budget.initial_date <= self.initial_date <= budget.final_date or (self.initial_date <= budget.initial_date and budget.final_date <= self.final_date):
-                    raise ValidationError("Budget is overlapping with another one.")
-
-        super(Budget, self).save(*args, **kwargs)
+        with transaction.atomic():
+            self.lock_budgets_of_user()
+
+            if self.overlapping_budgets(exclude_self=update).exists():
+                raise ValidationError("Budget is overlapping with another one.")
+
+            try:
+                with transaction.atomic():
+                    super(Budget, self).save(*args, **kwargs)
+            except IntegrityError as error:
+                # Postgres enforces the same rule with the budget_dates_do_not_overlap exclusion constraint
+                if 'budget_dates_do_not_overlap' in str(error):
+                    raise ValidationError("Budget is overlapping with another one.") from error
+                raise
+
+    def delete(self, *args, **kwargs):
+        # The cascade deletes every detail of the budget
+        with single_data_version_bump(User.objects.filter(pk=self.user_id)):
+            return super(Budget, self).delete(*args, **kwargs)
+
+    def overlapping_budgets(self, exclude_self=False):
+        budgets = Budget.objects.filter(user_id=self.user_id, initial_date__lte=self.final_date, final_date__gte=self.initial_date)
+        return budgets.exclude(id=self.id) if exclude_self else budgets
+
+    def lock_budgets_of_user(self):
+        """
+        Serializes budget writes of the same user until the transaction ends, so
+        two concurrent requests cannot both pass the overlap check. The user row
+        is locked with SELECT ... FOR UPDATE where supported. SQLite ignores it,
+        so there a no-op UPDATE takes the database write lock before the check.
+        """
+        if self.user_id is None:
+            return
+
+        user = User.objects.filter(pk=self.user_id)
+
+        if connection.features.has_select_for_update:
+            list(user.select_for_update().values_list('pk', flat=True))
+        else:
+            user.update(data_version=F('data_version'))
 
     @property
     def active(self):
@@ -154,18 +184,19 @@ class LimitDetail(Detail):
 
     @property
     def total_spent(self):
-        expenses = Expense.objects.filter(
-            user=self.assigned_budget.user,
+        total = DailySpending.objects.filter(
+            user_id=self.assigned_budget.user_id,
             date__gte=self.assigned_budget.initial_date,
             date__lte=self.assigned_budget.final_date,
-            category=self.category
-        )
-
-        total = sum([expense.value for expense in expenses])
+            category_id=self.category_id
+        ).aggregate(spent=Sum('total'))['spent']
 
-        return total
+        return total if total is not None else 0
 
 class FutureExpenseDetail(Detail):
+    class Meta:
+        indexes = [models.Index(fields=['expiration_date', 'expended'], name='future_expense_expiration_idx')]
+
     name = models.CharField(max_length=50, null=True)
     expiration_date = models.DateField(validators=[], null=True)
     expended = models.BooleanField(default=False)
@@ -181,6 +212,10 @@ class FutureExpenseDetail(Detail):
             'expiration_date': self.expiration_date
         }
 
+    @classmethod
+    def to_notify_on(cls, a_date):
+        return cls.objects.filter(expiration_date=a_date + timedelta(days=3), expended=False)
+
     def should_be_notified(self):
         return (self.expiration_date - date.today()).days == 3 and not self.expended
     
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+from django.db.models import F, Sum
+
+from budgets.models import LimitDetail, FutureExpenseDetail
+from expenses.models import DailySpending
+
+
+class BudgetSummary:
+    """
+    Dictionary representation of a budget built from already loaded details
+    and spending. Use for_budget or for_budgets to load them with a constant
+    number of queries: one for the limits, one for the future expenses (both
+    with their categories) and one grouped Sum of the daily spending that
+    falls within the dates of each budget.
+    """
+
+    def __init__(self, budget, limit_details, future_expense_details, spent_by_category):
+        self.budget = budget
+        self.limit_details = limit_details
+        self.future_expense_details = future_expense_details
+        self.spent_by_category = spent_by_category
+
+    @classmethod
+    def for_budget(cls, budget):
+        return cls.for_budgets([budget])[0]
+
+    @classmethod
+    def for_budgets(cls, budgets):
+        budgets = list(budgets)
+
+        if len(budgets) == 0:
+            return []
+
+        budget_ids = [budget.id for budget in budgets]
+        limit_details = {budget_id: [] for budget_id in budget_ids}
+        future_expense_details = {budget_id: [] for budget_id in budget_ids}
+        spent_by_budget_and_category = {budget_id: {} for budget_id in budget_ids}
+
+        for detail in LimitDetail.objects.filter(assigned_budget_id__in=budget_ids).select_related('category').order_by('id'):
+            limit_details[detail.assigned_budget_id].append(detail)
+
+        for detail in FutureExpenseDetail.objects.filter(assigned_budget_id__in=budget_ids).select_related('category').order_by('id'):
+            future_expense_details[detail.assigned_budget_id].append(detail)
+
+        # Each day of spending is joined with the budgets of its user whose dates contain it
+        spent_rows = DailySpending.objects.filter(
+            user__budget__id__in=budget_ids,
+            date__gte=F('user__budget__initial_date'),
+            date__lte=F('user__budget__final_date')
+        ).values('user__budget__id', 'category_id').annotate(spent=Sum('total'))
+
+        for row in spent_rows:
+            spent_by_budget_and_category[row['user__budget__id']][row['category_id']] = row['spent']
+
+        return [
+            cls(budget, limit_details[budget.id], future_expense_details[budget.id], spent_by_budget_and_category[budget.id])
+            for budget in budgets
+        ]
+
+    def spent_of(self, detail):
+        return self.spent_by_category.get(detail.category_id, Decimal(0))
+
+    @property
+    def details(self):
+        return self.limit_details + self.future_expense_details
+
+    @property
+    def total_limit(self):
+        return sum([detail.limit for detail in self.limit_details])
+
+    @property
+    def total_spent(self):
+        return sum([self.spent_of(detail) for detail in self.limit_details])
+
+    def limit_detail_as_dict(self, detail):
+        return {
+            'category': detail.category.as_dict,
+            'limit': float(detail.limit),
+            'spent': float(self.spent_of(detail))
+        }
+
+    @property
+    def as_dict(self):
+        return {
+            'id': self.budget.id,
+            'initial_date': str(self.budget.initial_date),
+            'final_date': str(self.budget.final_date),
+            'details': [self.limit_detail_as_dict(detail) for detail in self.limit_details] + [detail.as_dict for detail in self.future_expense_details],
+            'total_limit': float(self.total_limit),
+            'total_spent': float(self.total_spent),
+            'active': self.budget.active,
+            'editable': self.budget.editable,
+            'has_finished': self.budget.has_finished
+        }
+
+    def as_dict_with_categories(self, categories_as_dict):
+        """
+        Front-End requires all limits with each category, even if it's 0.
+        categories_as_dict is loaded once by the caller and shared by every budget.
+        """
+        budget_as_dict = self.as_dict
+        categories_that_have_limit_budgets = set([detail.category_id for detail in self.limit_details])
+
+        budget_as_dict['details'] += [
+            {'category': category_as_dict, 'limit': 0, 'spent': 0}
+            for category_as_dict in categories_as_dict if category_as_dict['id'] not in categories_that_have_limit_budgets
+        ]
+
+        return budget_as_dict
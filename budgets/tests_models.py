@@ -10,10 +10,13 @@ from users.constants import FIREBASE_UID_LENGTH
 from utils import create_random_string
 from users.models import User
 from budgets.models import Budget
+from budgets.summary import BudgetSummary
 from django.db.utils import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from expenses.models import Expense
 
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 # Create your tests here.
 class TestBudgetsModel(TestCase):
@@ -76,6 +79,32 @@ class TestBudgetsModel(TestCase):
             Budget.objects.create(
                 user=self.a_user, initial_date='2022-12-5', final_date='2023-12-1')
 
+    def test_budget_overlap_is_checked_with_the_same_queries_for_any_number_of_budgets(self):
+        def queries_to_create_budget(initial_date, final_date):
+            with CaptureQueriesContext(connection) as context:
+                Budget.objects.create(user=self.a_user, initial_date=initial_date, final_date=final_date)
+            return len(context.captured_queries)
+
+        def month_from_now(months):
+            initial_date = date.today() + timedelta(days=30 * months)
+            return initial_date, initial_date + timedelta(days=27)
+
+        queries_with_no_budgets = queries_to_create_budget(*month_from_now(0))
+
+        for months in range(1, 11):
+            Budget.objects.create(user=self.a_user, initial_date=month_from_now(months)[0], final_date=month_from_now(months)[1])
+
+        self.assertEqual(queries_to_create_budget(*month_from_now(11)), queries_with_no_budgets)
+
+    def test_updated_budget_does_not_overlap_with_itself(self):
+        budget = Budget.objects.create(user=self.a_user, initial_date=date.today(), final_date=date.today() + timedelta(days=730))
+
+        budget.final_date = date.today() + timedelta(days=1095)
+        budget.save(update=True)
+
+        budget.refresh_from_db()
+        self.assertEqual(budget.final_date, date.today() + timedelta(days=1095))
+
     def test_user_add_expense_in_budget(self):
         new_budget = Budget.objects.create(
             user=self.a_user, initial_date='2020-01-01', final_date='2025-01-01')
@@ -177,3 +206,65 @@ class TestBudgetsModel(TestCase):
 
         detail = new_budget.add_future_expense(Category.objects.all()[4], 4500, 'AySa Bill', (datetime.today().date() + timedelta(days=4)).strftime('%Y-%m-%d'))
         self.assertFalse(detail.should_be_notified())
+
+    def test_budget_summary_has_spent_of_each_limit(self):
+        today = date.today()
+        new_budget = Budget.objects.create(user=self.a_user, initial_date=today - timedelta(days=365), final_date=today + timedelta(days=365))
+
+        new_budget.add_limit(Category.objects.all()[0], 10000)
+        new_budget.add_limit(Category.objects.all()[1], 10000)
+        new_budget.add_future_expense(Category.objects.all()[1], 4500, 'AySa Bill', today + timedelta(days=30))
+
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=300), value=5000, category=Category.objects.all()[0], name='New Expense')
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=10), value=2500.50, category=Category.objects.all()[0], name='New Expense')
+        # Spent before the budget began
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=400), value=5000, category=Category.objects.all()[1], name='New Expense')
+
+        budget_as_dict = BudgetSummary.for_budget(new_budget).as_dict
+
+        self.assertEqual(budget_as_dict['details'][0]['spent'], 7500.50)
+        self.assertEqual(budget_as_dict['details'][1]['spent'], 0)
+        self.assertEqual(budget_as_dict['details'][2]['name'], 'AySa Bill')
+        self.assertEqual(budget_as_dict['total_limit'], 20000)
+        self.assertEqual(budget_as_dict['total_spent'], 7500.50)
+
+    def test_budget_summary_queries_do_not_grow_with_details(self):
+        today = date.today()
+        new_budget = Budget.objects.create(user=self.a_user, initial_date=today - timedelta(days=365), final_date=today + timedelta(days=365))
+
+        for category in Category.objects.all():
+            new_budget.add_limit(category, 10000)
+            new_budget.add_future_expense(category, 4500, 'AySa Bill', today + timedelta(days=30))
+            Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=10), value=5000, category=category, name='New Expense')
+
+        with self.assertNumQueries(3):
+            BudgetSummary.for_budget(new_budget).as_dict
+
+    def test_budget_summaries_are_loaded_for_several_budgets(self):
+        another_user = User.objects.create(firebase_uid=create_random_string(FIREBASE_UID_LENGTH), email='another@random.com')
+
+        today = date.today()
+        first_budget = Budget.objects.create(user=another_user, initial_date=today - timedelta(days=730), final_date=today + timedelta(days=365))
+        second_budget = Budget.objects.create(user=self.a_user, initial_date=today - timedelta(days=365), final_date=today + timedelta(days=365))
+
+        first_budget.add_limit(Category.objects.all()[0], 10000)
+        second_budget.add_limit(Category.objects.all()[0], 20000)
+        second_budget.add_limit(Category.objects.all()[1], 5000)
+
+        Expense.create_expense_for_user(another_user, date=today - timedelta(days=700), value=1000, category=Category.objects.all()[0], name='New Expense')
+        # Spent before the budget of the user began
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=700), value=700, category=Category.objects.all()[0], name='New Expense')
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=300), value=3000, category=Category.objects.all()[0], name='New Expense')
+        Expense.create_expense_for_user(self.a_user, date=today - timedelta(days=10), value=250, category=Category.objects.all()[1], name='New Expense')
+
+        with self.assertNumQueries(3):
+            summaries = BudgetSummary.for_budgets([first_budget, second_budget])
+
+        self.assertEqual(summaries[0].total_spent, 1000)
+        self.assertEqual(summaries[1].total_spent, 3250)
+        self.assertEqual(summaries[1].total_limit, 25000)
+
+        budget_as_dict = summaries[0].as_dict_with_categories([category.as_dict for category in Category.categories_from_user(self.a_user)])
+
+        self.assertEqual(len(budget_as_dict['details']), 5)
+        self.assertEqual(budget_as_dict['details'][1]['limit'], 0)
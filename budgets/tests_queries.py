@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from categories.models import Category
+from expenses.models import Expense
+from users.models import User
+from walletify.testing import QueryCountTestCase
+from .models import Budget
+
+
+# Create your tests here.
+class TestBudgetViewQueries(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(firebase_uid=self.DEV_USER_UID, email=self.DEV_USER_EMAIL)
+        self.categories = list(Category.objects.filter(user=None).order_by('id')[:3])
+        self.current_budget = self.create_budget(date.today() - timedelta(days=10), date.today() + timedelta(days=20))
+        self.next_initial_date = date.today() + timedelta(days=100)
+        self.add_budgets(1)
+        # Expended future expenses are added to a day that already has spending, in both counts
+        Expense.objects.create(user=self.user, value=10, date=date.today(), category=self.categories[0], name='An Expense')
+
+    def create_budget(self, initial_date, final_date):
+        budget = Budget.objects.create(user=self.user, initial_date=initial_date, final_date=final_date)
+
+        for category in self.categories:
+            budget.add_limit(category, 1000)
+            budget.add_future_expense(category, 10, 'Rent', final_date)
+
+        return budget
+
+    def add_budgets(self, count):
+        """Budgets after the current one, so they can still be modified and deleted."""
+        for _ in range(count):
+            budget = self.create_budget(self.next_initial_date, self.next_initial_date + timedelta(days=9))
+            self.next_initial_date += timedelta(days=10)
+
+        return budget
+
+    def add_data(self):
+        self.add_budgets(10)
+
+        for number in range(30):
+            Expense.objects.create(user=self.user, value=10, date=date.today() - timedelta(days=number % 10), category=self.categories[number % 3], name='An Expense')
+
+        Category.create_category_for_user(self.user, name='Another Category', material_ui_icon_name='Paid')
+
+    def details_body(self, expiration_date):
+        return [{'category_id': category.id, 'limit': 500} for category in self.categories] + [{'category_id': self.categories[0].id, 'value': 10, 'name': 'Rent', 'expiration_date': str(expiration_date)}]
+
+    def test_get_budgets(self):
+        self.assertQueriesDoNotGrow(8, lambda: self.count_queries('get', '/budget'), self.add_data)
+
+    def test_get_the_current_budget(self):
+        self.assertQueriesDoNotGrow(6, lambda: self.count_queries('get', '/budget/current'), self.add_data)
+
+    def test_create_a_budget(self):
+        def count():
+            body = {'initial_date': str(self.next_initial_date), 'final_date': str(self.next_initial_date + timedelta(days=9)), 'details': self.details_body(self.next_initial_date)}
+            self.next_initial_date += timedelta(days=10)
+            return self.count_queries('post', '/budget', body)
+
+        self.assertQueriesDoNotGrow(24, count, self.add_data)
+
+    def test_modify_a_budget(self):
+        def count():
+            budget = self.add_budgets(1)
+            body = {'id': budget.id, 'initial_date': str(budget.initial_date), 'final_date': str(budget.final_date), 'details': self.details_body(budget.final_date)}
+            return self.count_queries('patch', '/budget', body)
+
+        self.assertQueriesDoNotGrow(36, count, self.add_data)
+
+    def test_delete_a_budget(self):
+        def count():
+            budget = self.add_budgets(1)
+            return self.count_queries('delete', '/budget', {'id': budget.id})
+
+        self.assertQueriesDoNotGrow(12, count, self.add_data)
+
+    def test_expend_a_future_expense(self):
+        def count():
+            future_expense = self.current_budget.add_future_expense(self.categories[0], 10, 'Gas Bill', date.today())
+            return self.count_queries('patch', '/budget/expended', {'future_expense_id': future_expense.id, 'expense_done_date': str(date.today())})
+
+        self.assertQueriesDoNotGrow(17, count, self.add_data)
@@ -12,6 +12,7 @@ from users.models import User
 from budgets.models import Budget
 from django.db.utils import IntegrityError
 from expenses.models import Expense
+from datetime import date, timedelta
 
 # Create your tests here.
 
@@ -286,6 +287,25 @@ class TestBudgetsView(APITestCase):
         self.assertEqual(response.json(), {})
 
 
+    def test_current_budget_is_read_again_without_changes(self):
+        today = date.today()
+        self.create_a_budget_with_response(str(today - timedelta(days=30)), str(today + timedelta(days=335)), [{'category_id': 1, 'limit': 5000}], status.HTTP_201_CREATED)
+
+        response = self.client.get(self.endpoint + '/current')
+        etag = response['ETag']
+
+        response = self.client.get(self.endpoint + '/current', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.post('/expense', {'value': 100, 'date': str(today - timedelta(days=10)), 'category_id': 1, 'name': 'An Expense'}, format='json')
+
+        response = self.client.get(self.endpoint + '/current', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_spent'], 100)
+
     def test_creates_two_budgets_with_different_details_for_user_and_then_he_retrieve_them(self):
         self.create_a_budget_with_response('2023-11-01', '2023-12-01', [
             {
@@ -1,6 +1,6 @@
 from urllib import response
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.views.decorators.http import condition
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -10,7 +10,12 @@ from datetime import datetime
 
 from expenses.models import Expense
 from budgets.models import Budget, Detail, FutureExpenseDetail, LimitDetail
+from budgets.summary import BudgetSummary
 from categories.models import Category
+from users.models import User
+from users.signals import single_data_version_bump
+from walletify.conditional import budget_etag, data_version_of
+from walletify.timing import JsonResponse
 from django.core.exceptions import ValidationError
 
 from drf_yasg.utils import swagger_auto_schema
@@ -102,6 +107,7 @@ class GetBudgetSerializer(serializers.ModelSerializer):
 @swagger_auto_schema(method='patch', request_body=PatchBudgetSerializer)
 @swagger_auto_schema(method='delete', request_body=DeleteBudgetSerializer)
 @api_view(['GET', 'POST', 'PATCH', 'DELETE'])
+@condition(etag_func=budget_etag)
 def budget(request):
     request_body = request.META['body']
 
@@ -123,20 +129,15 @@ def budget(request):
             return Response({"message": f"Initial date cannot be greater than final date"}, status=status.HTTP_400_BAD_REQUEST)
 
     if request.method == 'GET':
-        user_budgets = Budget.all_from_user(request.META['user'])
-        budgets_as_dict = [budget.as_dict for budget in user_budgets]
-        all_categories_from_user = Category.categories_from_user(request.META['user'])
-
-        # Front-End requires all limits with each category, even if it's 0
-        for budget_index in range(len(budgets_as_dict)):
-            if len(budgets_as_dict[budget_index]['details']) == 0:
-                user_budgets[budget_index].delete()
-                budgets_as_dict[budget_index] = {}
-            else:
-                categories_that_have_limit_budgets = [ detail['category']['id'] for detail in budgets_as_dict[budget_index]['details'] if detail.get('limit', None) is not None ]
-                budgets_as_dict[budget_index]['details'] += [{ 'category': user_category.as_dict, 'limit': 0, 'spent': 0 } for user_category in all_categories_from_user if user_category.id not in categories_that_have_limit_budgets]
+        budget_summaries = BudgetSummary.for_budgets(Budget.all_from_user(request.META['user']))
+        all_categories_from_user = Category.catalog_of(request.META['user'], data_version_of(request))
+
+        empty_budget_ids = [summary.budget.id for summary in budget_summaries if len(summary.details) == 0]
+
+        if len(empty_budget_ids) != 0:
+            Budget.objects.filter(id__in=empty_budget_ids).delete()
 
-        budgets_as_dict = [budget for budget in budgets_as_dict if budget != {}]
+        budgets_as_dict = [summary.as_dict_with_categories(all_categories_from_user) for summary in budget_summaries if len(summary.details) != 0]
 
         return JsonResponse(budgets_as_dict, safe=False)
 
@@ -183,8 +184,10 @@ def budget(request):
             budget.final_date = datetime.strptime(request_body['final_date'], '%Y-%m-%d').date()
             current_details = LimitDetail.from_budget(budget)
 
-            for detail in current_details:
-                detail.delete()
+            with single_data_version_bump(User.objects.filter(pk=budget.user_id)):
+                LimitDetail.objects.filter(assigned_budget=budget).delete()
+                FutureExpenseDetail.objects.filter(assigned_budget=budget).delete()
+
             try:
                 create_details(request_body['details'], budget)
             except Exception as e:
@@ -202,6 +205,7 @@ def budget(request):
 
 
 @api_view(['GET'])
+@condition(etag_func=budget_etag)
 def current_budget(request):
     if request.method == 'GET':
         current_user_budget = Budget.current_budget_of(request.META['user'])
@@ -209,11 +213,13 @@ def current_budget(request):
         if current_user_budget is None:
             return JsonResponse({}, safe=False)
         else:
-            if len(current_user_budget.as_dict['details']) == 0:
+            current_user_budget_as_dict = BudgetSummary.for_budget(current_user_budget).as_dict
+
+            if len(current_user_budget_as_dict['details']) == 0:
                 current_user_budget.delete()
                 return JsonResponse({}, safe=False)
             else:
-                return JsonResponse(current_user_budget.as_dict, safe=False)
+                return JsonResponse(current_user_budget_as_dict, safe=False)
 
 class MakeFutureExpenseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CategoriesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "categories"
+
+    def ready(self):
+        from users.signals import track_data_version, owner_of
+        from .models import Category
+
+        track_data_version(Category, owner_of)
@@ -1,8 +1,12 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 
 from users.models import User
+from users.signals import owner_of, single_data_version_bump
 from utils import create_random_color_string
 
 
@@ -51,9 +55,48 @@ class Category(models.Model):
         user_created_categories = cls.objects.filter(user=user)
         return static_categories.union(user_created_categories).order_by('id')
 
+    @staticmethod
+    def catalog_key(user_id, data_version=None):
+        return 'categories:static' if user_id is None else f'categories:user:{user_id}:{data_version}'
+
+    @classmethod
+    def cached_catalog(cls, user_id, data_version=None):
+        """
+        Dictionaries of the categories created by the user (or of the static
+        ones for None), read from the cache of the process and stored there
+        once the transaction that read them commits. Every change to them
+        bumps the data version of the user, so catalogs of an older version
+        are never read again and nothing has to be invalidated. Static
+        categories only change with migrations.
+        """
+        key = cls.catalog_key(user_id, data_version)
+        catalog = cache.get(key)
+
+        if catalog is None:
+            catalog = [category.as_dict for category in cls.objects.filter(user_id=user_id).order_by('id')]
+            transaction.on_commit(lambda: cache.set(key, catalog, settings.CATEGORY_CATALOG_TTL))
+
+        return catalog
+
+    @classmethod
+    def catalog_of(cls, user, data_version=None):
+        """
+        Same categories as categories_from_user, as dictionaries and usually
+        without any query. Views pass the data version they already read,
+        otherwise it is read here.
+        """
+        if data_version is None:
+            data_version = User.data_version_of(user.id)
+
+        return sorted(cls.cached_catalog(None) + cls.cached_catalog(user.id, data_version), key=lambda category: category['id'])
+
+    @classmethod
+    def catalog_by_id_of(cls, user, data_version=None):
+        return {category['id']: category for category in cls.catalog_of(user, data_version)}
+
     @property
     def static(self):
-        return self.user == None
+        return self.user_id is None
 
     @property
     def as_dict(self):
@@ -67,15 +110,17 @@ class Category(models.Model):
 
     def save(self, *args, update=False, **kwargs):
         self.name = self.name.lower()
-        user_categories = Category.categories_from_user(self.user)
 
         if not update:
-            categories_with_new_category_name = [category for category in user_categories if category.name == self.name]
-
-            if len(categories_with_new_category_name) != 0:
+            if Category.objects.filter(Q(user=None) | Q(user_id=self.user_id), name=self.name).exists():
                 raise ValidationError(
                     "User cannot create another repeated category")
 
         self.color = create_random_color_string()
         self.full_clean()
         super(Category, self).save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        # The cascade deletes the expenses and details of the category
+        with single_data_version_bump(owner_of(self)):
+            return super(Category, self).delete(*args, **kwargs)
@@ -12,6 +12,7 @@ from utils import create_random_string
 from users.models import User
 
 from random import randint
+from django.core.cache import cache
 
 # Create your tests here.
 class TestCategoriesModel(TestCase):
@@ -49,3 +50,31 @@ class TestCategoriesModel(TestCase):
         self.assertEqual(category_created.as_dict['material_ui_icon_name'], 'SdCard')
         self.assertEqual(category_created.as_dict['color'], category_created.color)
         self.assertFalse(category_created.as_dict['static'])
+
+    def test_category_catalog_has_static_and_user_categories(self):
+        Category.objects.create(user=self.a_user, name='Education', material_ui_icon_name='School')
+
+        self.assertEqual(Category.catalog_of(self.a_user), [category.as_dict for category in Category.categories_from_user(self.a_user)])
+
+    def test_category_catalog_is_cached_by_data_version(self):
+        cache.clear()
+        data_version = User.data_version_of(self.a_user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.catalog_of(self.a_user, data_version)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(Category.catalog_of(self.a_user, data_version)), 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category_created = Category.objects.create(user=self.a_user, name='Education', material_ui_icon_name='School')
+
+        self.assertEqual(len(Category.catalog_of(self.a_user)), 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category_created.delete()
+
+        self.assertEqual(len(Category.catalog_of(self.a_user)), 5)
+        # Writes never touch the cache, the catalog of the old version is simply not read anymore
+        self.assertEqual(cache.get(Category.catalog_key(self.a_user.id, data_version)), [])
+        cache.clear()
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from expenses.models import Expense
+from users.models import User
+from walletify.testing import QueryCountTestCase
+from .models import Category
+
+
+# Create your tests here.
+class TestCategoryViewQueries(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(firebase_uid=self.DEV_USER_UID, email=self.DEV_USER_EMAIL)
+        self.created_categories = 0
+        self.add_categories(1)
+
+    def add_categories(self, count):
+        for _ in range(count):
+            self.created_categories += 1
+            category = Category.create_category_for_user(self.user, name=f'Category {self.created_categories}', material_ui_icon_name='Paid')
+
+            for number in range(5):
+                Expense.objects.create(user=self.user, value=100, date=date.today() - timedelta(days=number), category=category, name='An Expense')
+
+        return category
+
+    def add_data(self):
+        self.add_categories(10)
+
+    def test_get_categories(self):
+        self.assertQueriesDoNotGrow(4, lambda: self.count_queries('get', '/category'), self.add_data)
+
+    def test_create_a_category(self):
+        def count():
+            self.created_categories += 1
+            return self.count_queries('post', '/category', {'name': f'Category {self.created_categories}', 'material_ui_icon_name': 'Paid'})
+
+        self.assertQueriesDoNotGrow(5, count, self.add_data)
+
+    def test_modify_a_category(self):
+        def count():
+            category = self.add_categories(1)
+            return self.count_queries('patch', '/category', {'id': category.id, 'name': f'Renamed {category.id}', 'material_ui_icon_name': 'Home'})
+
+        self.assertQueriesDoNotGrow(8, count, self.add_data)
+
+    def test_delete_a_category(self):
+        def count():
+            category = self.add_categories(1)
+            return self.count_queries('delete', '/category', {'id': category.id})
+
+        self.assertQueriesDoNotGrow(12, count, self.add_data)
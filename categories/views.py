@@ -1,12 +1,14 @@
 from urllib import response
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.views.decorators.http import condition
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status, serializers
 
 from categories.models import Category
+from walletify.conditional import data_version_of, user_data_etag
+from walletify.timing import JsonResponse
 
 from drf_yasg.utils import swagger_auto_schema
 
@@ -50,6 +52,7 @@ class GetCategorySerializer(serializers.ModelSerializer):
 @swagger_auto_schema(method='patch', request_body=PatchCategorySerializer)
 @swagger_auto_schema(method='delete', request_body=DeleteCategorySerializer)
 @api_view(['GET', 'POST', 'PATCH', 'DELETE'])
+@condition(etag_func=user_data_etag)
 def category(request):
     request_body = request.META['body']
 
@@ -66,8 +69,7 @@ def category(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     if request.method == 'GET':
-        user_categories = Category.categories_from_user(request.META['user'])
-        categories_as_dict = [category.as_dict for category in user_categories]
+        categories_as_dict = Category.catalog_of(request.META['user'], data_version_of(request))
         return JsonResponse(categories_as_dict, safe=False)
 
     elif request.method == 'POST':
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ExpensesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "expenses"
+
+    def ready(self):
+        from users.signals import track_data_version, owner_of
+        from .models import Expense
+
+        track_data_version(Expense, owner_of)
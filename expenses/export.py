@@ -0,0 +1,48 @@
+import csv
+import json
+
+EXPORT_FIELDS = ['id', 'date', 'category_id', 'category_name', 'value', 'name', 'future_expense']
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class Echo:
+    """File-like object whose write returns the line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def export_row(row):
+    return {
+        'id': row['id'],
+        'date': str(row['date']),
+        'category_id': row['category_id'],
+        'category_name': row['category__name'].title(),
+        'value': float(row['value']),
+        'name': row['name'],
+        'future_expense': row['future_expense'],
+    }
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(export_row(row)) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+
+    yield writer.writeheader()
+
+    for row in rows:
+        yield writer.writerow(export_row(row))
+
+
+EXPORTERS = {
+    'ndjson': ndjson_lines,
+    'csv': csv_lines,
+}
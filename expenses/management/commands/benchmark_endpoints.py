@@ -0,0 +1,69 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import User
+from walletify.benchmark import Benchmark, DevAuthentication, LocalTokenIssuer, default_endpoints, regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Drives the API endpoints in process with many users and reports latency percentiles, throughput, '
+        'SQL queries and bytes per response as JSON. Run it against a database filled by seed_walletify.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=4, help='Threads sending requests at the same time.')
+        parser.add_argument('--users', type=int, default=100, help='Users the requests are spread over, the first ones by id.')
+        parser.add_argument('--warmup', type=int, default=10, help='Requests per read-only endpoint sent before measuring.')
+        parser.add_argument('--endpoints', nargs='+', help='Only these endpoints.')
+        parser.add_argument('--auth', choices=['token', 'dev'], default='token', help='Locally signed tokens of many users, or the DEV bypass of a single user.')
+        parser.add_argument('--output', help='File the JSON results are written to, instead of the standard output.')
+        parser.add_argument('--baseline', help='JSON results of a previous run. Fails if an endpoint regressed against it.')
+        parser.add_argument('--max-latency-increase', type=float, default=0.2, help='Allowed p95 increase over the baseline, as a fraction.')
+
+    def handle(self, *args, **options):
+        endpoints = default_endpoints()
+
+        if options['endpoints']:
+            unknown = set(options['endpoints']) - set([endpoint.name for endpoint in endpoints])
+
+            if len(unknown) != 0:
+                raise CommandError(f"Unknown endpoints {', '.join(sorted(unknown))}. Use some of {', '.join([endpoint.name for endpoint in endpoints])}.")
+
+            endpoints = [endpoint for endpoint in endpoints if endpoint.name in options['endpoints']]
+
+        if options['auth'] == 'dev':
+            authentication = DevAuthentication()
+            users = authentication.users()
+            token_issuer = None
+        else:
+            authentication = token_issuer = LocalTokenIssuer()
+            users = list(User.objects.order_by('id')[:options['users']])
+
+        if len(users) == 0:
+            raise CommandError("There are no users to benchmark with. Run seed_walletify first.")
+
+        benchmark = Benchmark(users, endpoints, options['requests'], options['concurrency'], options['warmup'], token_issuer)
+
+        with authentication:
+            results = benchmark.run()
+
+        output = json.dumps(results, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+        for name, stats in results['endpoints'].items():
+            self.stderr.write(f"{name}: {stats['throughput']} req/s, p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, p99 {stats['p99_ms']} ms, {stats['queries_mean']} queries, {stats['bytes_mean']} bytes, {stats['errors']} errors")
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                messages = regressions(json.load(file), results, options['max_latency_increase'])
+
+            if len(messages) != 0:
+                raise CommandError("Endpoints regressed against the baseline:\n" + '\n'.join(messages))
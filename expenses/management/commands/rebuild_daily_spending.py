@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.models import DailySpending
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily spending rollup from the raw expenses, or only verifies it with --verify.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Only compare the rollup against the expenses and report the differences.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query while rebuilding.')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            DailySpending.rebuild(batch_size=options['batch_size'])
+            self.stdout.write(f"Daily spending rebuilt with {DailySpending.objects.count()} rows.")
+
+        mismatches = DailySpending.mismatches()
+
+        for user_id, category_id, date, stored, expected in mismatches:
+            self.stdout.write(f"User {user_id}, category {category_id}, {date}: stored {stored}, expected {expected}")
+
+        if len(mismatches) != 0:
+            raise CommandError(f"Daily spending has {len(mismatches)} wrong rows.")
+
+        self.stdout.write(self.style.SUCCESS("Daily spending matches the expenses."))
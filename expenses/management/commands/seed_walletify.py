@@ -0,0 +1,62 @@
+from argparse import ArgumentTypeError
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from walletify.seed import Seeder, delete_seeded_users, parse_range
+
+
+def count_range(value):
+    try:
+        return parse_range(value)
+    except ValueError as error:
+        raise ArgumentTypeError(str(error))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a reproducible synthetic dataset of users with their categories, budgets, limit details, '
+        'future expenses and expenses. Counts per user are N or a uniform MIN:MAX range.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', type=int, help='Users to generate.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator. The same seed and arguments generate the same data.')
+        parser.add_argument('--first-user', type=int, default=0, help='Number of the first generated user, to add users to an already seeded database.')
+        parser.add_argument('--categories', type=count_range, default='0:3', help='Categories created by each user.')
+        parser.add_argument('--budgets', type=count_range, default='1:3', help='Consecutive budgets of each user, the last one being the current one.')
+        parser.add_argument('--limit-details', type=count_range, default='0:5', help='Category limits of each budget.')
+        parser.add_argument('--future-expenses', type=count_range, default='0:5', help='Future expenses of each budget.')
+        parser.add_argument('--expenses', type=count_range, default='0:100', help='Expenses of each user.')
+        parser.add_argument('--days', type=int, default=365, help='Expenses are dated within this many days up to today.')
+        parser.add_argument('--budget-days', type=int, default=30, help='Days covered by each budget.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per query.')
+        parser.add_argument('--users-per-chunk', type=int, default=500, help='Users generated per transaction.')
+        parser.add_argument('--flush', action='store_true', help='Delete the previously generated users and their data first.')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            self.stdout.write(f"Deleted {delete_seeded_users()} rows of previously generated users.")
+
+        seeder = Seeder(
+            seed=options['seed'],
+            categories=options['categories'],
+            budgets=options['budgets'],
+            limit_details=options['limit_details'],
+            future_expenses=options['future_expenses'],
+            expenses=options['expenses'],
+            days=options['days'],
+            budget_days=options['budget_days'],
+            batch_size=options['batch_size'],
+            users_per_chunk=options['users_per_chunk'],
+            log=self.stdout.write
+        )
+
+        try:
+            counts = seeder.seed(options['users'], first_index=options['first_user'])
+        except IntegrityError:
+            raise CommandError("Some of these users were already generated. Use --flush or another --first-user.")
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {counts}"))
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.1 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def populate_daily_spending(apps, schema_editor):
+    Expense = apps.get_model('expenses', 'Expense')
+    DailySpending = apps.get_model('expenses', 'DailySpending')
+
+    rows = Expense.objects.order_by().values('user_id', 'category_id', 'date').annotate(row_total=Sum('value'), row_count=Count('id'))
+
+    DailySpending.objects.bulk_create([
+        DailySpending(user_id=row['user_id'], category_id=row['category_id'], date=row['date'], total=row['row_total'], count=row['row_count'])
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_email'),
+        ('categories', '0002_category_color'),
+        ('expenses', '0002_expense_future_expense'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySpending',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='categories.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.user')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyspending',
+            constraint=models.UniqueConstraint(fields=('user', 'category', 'date'), name='one daily spending per user, category and date'),
+        ),
+        migrations.RunPython(populate_daily_spending, migrations.RunPython.noop),
+    ]
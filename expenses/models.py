@@ -1,10 +1,12 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Q, Sum, Count
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from categories.models import Category
 from datetime import date
 from users.models import User
 from datetime import datetime
+from expenses.pagination import encode_cursor, decode_cursor
 import requests
 
 
@@ -18,6 +20,12 @@ def validate_date_is_not_in_the_future(value):
 
 
 class Expense(models.Model):
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-date', '-id'], name='expense_user_date_id_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_category_date_idx'),
+        ]
+
     id = models.AutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
     date = models.DateField(validators=[validate_date_is_not_in_the_future], null=False)
@@ -35,29 +43,231 @@ class Expense(models.Model):
     def create_expense_for_user(cls, user, **kwargs):
         cls.objects.create(user=user, **kwargs)
 
+    @classmethod
+    def bulk_create_for_user(cls, user, expenses, batch_size):
+        """
+        Inserts already validated expenses batch_size rows at a time and adds
+        them to the daily spending, all in one transaction.
+        """
+        for expense in expenses:
+            expense.user = user
+
+        with transaction.atomic():
+            created_expenses = cls.objects.bulk_create(expenses, batch_size=batch_size)
+            DailySpending.add_expenses(created_expenses)
+            # bulk_create sends no post_save signals
+            User.bump_data_version(user.id)
+
+        return created_expenses
+
     @classmethod
     def expenses_from_user(cls, user):
-        return cls.objects.order_by('-date').filter(user=user)
+        return cls.objects.order_by('-date', '-id').filter(user=user)
+
+    @classmethod
+    def page_from_user(cls, user, page_size, cursor=None):
+        """
+        Returns up to page_size expenses of the user that come after the cursor
+        and the cursor of the next page (None on the last one). Pages are
+        sliced on (date, id) through expense_user_date_id_idx, so deep pages
+        cost the same as the first one.
+        """
+        page = list(cls.expenses_after_cursor_from_user(user, cursor)[:page_size + 1])
+
+        if len(page) > page_size:
+            return page[:page_size], encode_cursor(page[page_size - 1])
+        else:
+            return page, None
+
+    @classmethod
+    def expenses_after_cursor_from_user(cls, user, cursor=None):
+        expenses = cls.expenses_from_user(user)
+
+        if cursor is not None:
+            last_date, last_id = decode_cursor(cursor)
+            expenses = expenses.filter(Q(date__lte=last_date) & (Q(date__lt=last_date) | Q(id__lt=last_id)))
+
+        return expenses
+
+    @classmethod
+    def export_rows_from_user(cls, user, chunk_size):
+        """
+        Streams plain dictionaries of the expenses of the user, reading them
+        from the database chunk_size rows at a time.
+        """
+        return cls.expenses_from_user(user).values(
+            'id', 'date', 'category_id', 'category__name', 'value', 'name', 'future_expense'
+        ).iterator(chunk_size=chunk_size)
 
     @classmethod
     def filter_within_timeline_from_user(cls, user, first_date, last_date):
-        return cls.objects.order_by('-date').filter(user=user, date__gte=first_date, date__lte=last_date)
+        return cls.objects.order_by('-date', 'id').filter(user=user, date__gte=first_date, date__lte=last_date)
 
     @classmethod
     def filter_by_category_within_timeline_from_user(cls, user, first_date, last_date, selected_category):
-        return cls.objects.order_by('-date').filter(user=user, date__gte=first_date, date__lte=last_date, category=selected_category)
+        return cls.objects.order_by('-date', 'id').filter(user=user, date__gte=first_date, date__lte=last_date, category=selected_category)
+
+    @classmethod
+    def filter_by_categories_within_timeline_from_user(cls, user, first_date, last_date, category_ids):
+        """
+        Same as filter_by_category_within_timeline_from_user for every category
+        in one query, grouped in the order of category_ids. Ids may come as
+        strings, and ones that are not integers raise ValueError.
+        """
+        category_ids = [int(category_id) for category_id in category_ids]
+        expenses = cls.objects.order_by('-date', 'id').filter(user=user, date__gte=first_date, date__lte=last_date, category_id__in=category_ids)
+        position_of = {category_id: position for position, category_id in reversed(list(enumerate(category_ids)))}
+
+        # sorted is stable, so each category keeps the order of the query
+        return sorted(expenses, key=lambda expense: position_of[expense.category_id])
 
     @property
     def as_dict(self):
+        return self.as_dict_from_catalog({})
+
+    def as_dict_from_catalog(self, categories_by_id):
+        """Serializes the expense taking its category from Category.catalog_by_id_of when it is there."""
+        category_as_dict = categories_by_id.get(self.category_id)
+
         return {
             'id': self.id,
             'date': str(self.date),
-            'category': self.category.as_dict,
+            'category': category_as_dict if category_as_dict is not None else self.category.as_dict,
             'value': float(self.value),
             'name': self.name,
             'future_expense': self.future_expense
         }
 
+    def stored_spending(self):
+        return Expense.objects.select_for_update().filter(pk=self.pk).values('user_id', 'category_id', 'date', 'value').first()
+
     def save(self, *args, **kwargs):
         self.full_clean()
-        return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            previous_spending = self.stored_spending() if self.pk is not None else None
+
+            if previous_spending is not None:
+                DailySpending.add(previous_spending['user_id'], previous_spending['category_id'], previous_spending['date'], -previous_spending['value'], -1)
+
+            saved = super().save(*args, **kwargs)
+            DailySpending.add(self.user_id, self.category_id, self.date, self.value, 1)
+
+        return saved
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_spending = self.stored_spending()
+
+            if previous_spending is not None:
+                DailySpending.add(previous_spending['user_id'], previous_spending['category_id'], previous_spending['date'], -previous_spending['value'], -1)
+
+            return super().delete(*args, **kwargs)
+
+
+class DailySpending(models.Model):
+    """
+    Total and count of the expenses of a user in a category on one day. It is
+    kept up to date by Expense.save and Expense.delete in their transaction,
+    so spending over a date range can be read from a few pre-summed rows.
+    """
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'category', 'date'], name='one daily spending per user, category and date')]
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=False)
+    date = models.DateField(null=False)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0, null=False)
+    count = models.PositiveIntegerField(default=0, null=False)
+
+    @classmethod
+    def add(cls, user_id, category_id, date, total, count):
+        same_day = cls.objects.filter(user_id=user_id, category_id=category_id, date=date)
+
+        if same_day.update(total=F('total') + total, count=F('count') + count) == 0:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(user_id=user_id, category_id=category_id, date=date, total=total, count=count)
+            except IntegrityError:
+                # Another transaction created the row first
+                same_day.update(total=F('total') + total, count=F('count') + count)
+
+        if count < 0:
+            same_day.filter(count__lte=0).delete()
+
+    @classmethod
+    def add_expenses(cls, expenses):
+        """
+        Adds many new expenses to the rollup reading and writing each affected
+        day once, instead of calling add for every expense.
+        """
+        totals = {}
+
+        for expense in expenses:
+            key = (expense.user_id, expense.category_id, expense.date)
+            total, count = totals.get(key, (0, 0))
+            totals[key] = (total + expense.value, count + 1)
+
+        if len(totals) == 0:
+            return
+
+        with transaction.atomic():
+            existing_rows = cls.objects.select_for_update().filter(
+                user_id__in=set([key[0] for key in totals]),
+                date__gte=min([key[2] for key in totals]),
+                date__lte=max([key[2] for key in totals])
+            )
+
+            rows_to_update = []
+
+            for row in existing_rows:
+                key = (row.user_id, row.category_id, row.date)
+
+                if key in totals:
+                    total, count = totals.pop(key)
+                    row.total += total
+                    row.count += count
+                    rows_to_update.append(row)
+
+            cls.objects.bulk_update(rows_to_update, ['total', 'count'], batch_size=1000)
+
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create([
+                        cls(user_id=user_id, category_id=category_id, date=date, total=total, count=count)
+                        for (user_id, category_id, date), (total, count) in totals.items()
+                    ], batch_size=1000)
+            except IntegrityError:
+                # Another transaction created some of these days first
+                for (user_id, category_id, date), (total, count) in totals.items():
+                    cls.add(user_id, category_id, date, total, count)
+
+    @classmethod
+    def from_expenses(cls, expenses):
+        rows = expenses.order_by().values('user_id', 'category_id', 'date').annotate(row_total=Sum('value'), row_count=Count('id'))
+
+        for row in rows.iterator():
+            yield cls(user_id=row['user_id'], category_id=row['category_id'], date=row['date'], total=row['row_total'], count=row['row_count'])
+
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cls.from_expenses(Expense.objects.all()), batch_size=batch_size)
+
+    @classmethod
+    def mismatches(cls):
+        """
+        Compares the rollup against the raw expenses and returns a list of
+        (user_id, category_id, date, stored, expected) for every wrong day.
+        """
+        stored = {(row.user_id, row.category_id, row.date): (row.total, row.count) for row in cls.objects.all().iterator()}
+        expected = {(row.user_id, row.category_id, row.date): (row.total, row.count) for row in cls.from_expenses(Expense.objects.all())}
+
+        return [
+            key + (stored.get(key), expected.get(key))
+            for key in sorted(set(stored) | set(expected))
+            if stored.get(key) != expected.get(key)
+        ]
@@ -0,0 +1,38 @@
+import base64
+import json
+from datetime import date
+
+
+def encode_cursor(expense):
+    """
+    Opaque cursor pointing right after the given expense in the
+    ('-date', '-id') order used to list the expenses of a user.
+    """
+    raw_cursor = json.dumps([str(expense.date), expense.id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw_cursor).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw_cursor = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        expense_date, expense_id = json.loads(raw_cursor.decode('utf-8'))
+        return date.fromisoformat(expense_date), int(expense_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError(f"Cursor {cursor} is not valid")
+
+
+def parse_page_size(page_size, default, maximum):
+    if page_size is None:
+        return default
+
+    message = f"page_size must be an integer between 1 and {maximum}"
+
+    try:
+        page_size = int(page_size)
+    except (ValueError, TypeError):
+        raise ValueError(message)
+
+    if not 0 < page_size <= maximum:
+        raise ValueError(message)
+
+    return page_size
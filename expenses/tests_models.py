@@ -10,7 +10,12 @@ from rest_framework import status
 from users.models import User
 from utils import create_random_string
 from users.constants import FIREBASE_UID_LENGTH
-from .models import Expense
+from budgets.models import Budget, LimitDetail, FutureExpenseDetail
+from .models import Expense, DailySpending
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from decimal import Decimal
+from io import StringIO
 from datetime import date
 from random import choice
 import datetime
@@ -280,3 +285,103 @@ class TestExpensesModel(TestCase):
 
         self.assertEqual(len(filtered_expenses), 1)
         self.assertTrue(expense_one in filtered_expenses)
+
+    def assertDailySpending(self, category, a_date, total, count):
+        daily_spending = DailySpending.objects.get(user=self.a_user, category=category, date=a_date)
+        self.assertEqual(daily_spending.total, Decimal(total))
+        self.assertEqual(daily_spending.count, count)
+
+    def test_daily_spending_is_updated_when_expenses_are_created(self):
+        Expense.objects.create(user=self.a_user, value=500.25, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+        Expense.objects.create(user=self.a_user, value=240, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+        Expense.objects.create(user=self.a_user, value=100, date='2020-05-02', category=self.category_for_expense, name="An Expense")
+
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 1), '740.25', 2)
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 2), '100', 1)
+
+    def test_daily_spending_is_moved_when_an_expense_is_modified(self):
+        expense = Expense.objects.create(user=self.a_user, value=500, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+        Expense.objects.create(user=self.a_user, value=240, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+
+        expense.value = 300
+        expense.date = '2020-06-01'
+        expense.category = self.another_category
+        expense.save()
+
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 1), '240', 1)
+        self.assertDailySpending(self.another_category, date(2020, 6, 1), '300', 1)
+
+    def test_daily_spending_is_removed_when_its_last_expense_is_deleted(self):
+        expense = Expense.objects.create(user=self.a_user, value=500, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+        expense.delete()
+
+        self.assertFalse(DailySpending.objects.filter(user=self.a_user).exists())
+
+    def test_daily_spending_is_rebuilt_and_verified_by_command(self):
+        Expense.objects.create(user=self.a_user, value=500, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+        Expense.objects.create(user=self.a_user, value=240, date='2020-05-03', category=self.another_category, name="An Expense")
+
+        call_command('rebuild_daily_spending', '--verify', stdout=StringIO())
+
+        DailySpending.objects.filter(date='2020-05-01').update(total=1)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_spending', '--verify', stdout=StringIO())
+
+        call_command('rebuild_daily_spending', stdout=StringIO())
+
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 1), '500', 1)
+        self.assertDailySpending(self.another_category, date(2020, 5, 3), '240', 1)
+
+    def test_daily_spending_is_updated_by_bulk_created_expenses(self):
+        Expense.objects.create(user=self.a_user, value=500, date='2020-05-01', category=self.category_for_expense, name="An Expense")
+
+        Expense.bulk_create_for_user(self.a_user, [
+            Expense(value=Decimal('100.50'), date=date(2020, 5, 1), category=self.category_for_expense, name="An Expense"),
+            Expense(value=Decimal('200'), date=date(2020, 5, 2), category=self.category_for_expense, name="An Expense"),
+            Expense(value=Decimal('300'), date=date(2020, 5, 2), category=self.category_for_expense, name="An Expense"),
+        ], batch_size=2)
+
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 1), '600.50', 2)
+        self.assertDailySpending(self.category_for_expense, date(2020, 5, 2), '500', 2)
+        self.assertEqual(DailySpending.mismatches(), [])
+
+
+class TestSeedWalletify(TestCase):
+    def seed(self, *args):
+        call_command('seed_walletify', *args, stdout=StringIO())
+
+        return list(Expense.objects.filter(user__firebase_uid__startswith='seed').order_by('id').values_list('user__firebase_uid', 'category__name', 'date', 'value', 'name'))
+
+    def test_same_seed_generates_the_same_data(self):
+        expenses = self.seed('5', '--seed', '7', '--expenses', '10:20', '--users-per-chunk', '2', '--batch-size', '7')
+
+        self.assertEqual(User.objects.filter(firebase_uid__startswith='seed').count(), 5)
+        self.assertTrue(50 <= len(expenses) <= 100)
+        self.assertEqual(self.seed('5', '--seed', '7', '--expenses', '10:20', '--flush'), expenses)
+        self.assertNotEqual(self.seed('5', '--seed', '8', '--expenses', '10:20', '--flush'), expenses)
+
+    def test_generated_data_is_consistent(self):
+        self.seed('4', '--budgets', '3', '--limit-details', '2', '--future-expenses', '1', '--expenses', '30')
+
+        for user in User.objects.filter(firebase_uid__startswith='seed'):
+            budgets = list(Budget.objects.filter(user=user).order_by('initial_date'))
+
+            self.assertEqual(len(budgets), 3)
+            self.assertIsNotNone(Budget.current_budget_of(user))
+            self.assertTrue(all(earlier.final_date < later.initial_date for earlier, later in zip(budgets, budgets[1:])))
+
+        self.assertEqual(LimitDetail.objects.filter(assigned_budget__user__firebase_uid__startswith='seed').count(), 24)
+        self.assertEqual(FutureExpenseDetail.objects.filter(assigned_budget__user__firebase_uid__startswith='seed').count(), 12)
+        self.assertFalse(Expense.objects.filter(date__gt=date.today()).exists())
+        self.assertEqual(DailySpending.mismatches(), [])
+
+    def test_already_generated_users_are_not_generated_again(self):
+        self.seed('2')
+
+        with self.assertRaises(CommandError):
+            self.seed('2')
+
+        self.seed('2', '--first-user', '2')
+
+        self.assertEqual(User.objects.filter(firebase_uid__startswith='seed').count(), 4)
@@ -0,0 +1,91 @@
+from datetime import date, timedelta
+
+from categories.models import Category
+from users.models import User
+from walletify.testing import QueryCountTestCase
+from .models import Expense
+
+
+# Create your tests here.
+class TestExpenseViewQueries(QueryCountTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create(firebase_uid=self.DEV_USER_UID, email=self.DEV_USER_EMAIL)
+        self.categories = list(Category.objects.filter(user=None).order_by('id')[:3])
+        self.add_expenses(3)
+
+    def add_expenses(self, count):
+        for number in range(count):
+            Expense.objects.create(
+                user=self.user,
+                value=100 + number,
+                date=date.today() - timedelta(days=number % 20),
+                category=self.categories[number % len(self.categories)],
+                name='An Expense'
+            )
+
+    def add_data(self):
+        self.add_expenses(60)
+        Category.create_category_for_user(self.user, name='Another Category', material_ui_icon_name='Paid')
+
+    def expense_body(self, **kwargs):
+        return {'value': 100, 'date': str(date.today()), 'category_id': self.categories[0].id, 'name': 'An Expense', **kwargs}
+
+    def timeline(self):
+        return [str(date.today() - timedelta(days=30)), str(date.today())]
+
+    def test_get_expenses(self):
+        self.assertQueriesDoNotGrow(5, lambda: self.count_queries('get', '/expense'), self.add_data)
+
+    def test_get_a_deep_page_of_expenses(self):
+        def count():
+            cursor = self.client.get('/expense?page_size=2')['X-Next-Cursor']
+            return self.count_queries('get', f'/expense?page_size=2&cursor={cursor}')
+
+        self.assertQueriesDoNotGrow(5, count, self.add_data)
+
+    def test_create_an_expense(self):
+        self.assertQueriesDoNotGrow(10, lambda: self.count_queries('post', '/expense', self.expense_body()), self.add_data)
+
+    def test_modify_an_expense(self):
+        def count():
+            expense = Expense.objects.create(user=self.user, value=1, date=date.today(), category=self.categories[0], name='An Expense')
+            # Moved to a day that already has spending, in both counts
+            return self.count_queries('patch', '/expense', self.expense_body(id=expense.id, date=str(date.today() - timedelta(days=1)), category_id=self.categories[1].id))
+
+        self.assertQueriesDoNotGrow(15, count, self.add_data)
+
+    def test_delete_an_expense(self):
+        def count():
+            expense = Expense.objects.create(user=self.user, value=1, date=date.today(), category=self.categories[0], name='An Expense')
+            return self.count_queries('delete', '/expense', {'id': expense.id})
+
+        self.assertQueriesDoNotGrow(11, count, self.add_data)
+
+    def test_filter_expenses(self):
+        self.assertQueriesDoNotGrow(5, lambda: self.count_queries('post', '/expense/filter', {'timeline': self.timeline()}), self.add_data)
+
+    def test_filter_expenses_of_a_category(self):
+        body = lambda: {'timeline': self.timeline(), 'category_id': self.categories[0].id}
+
+        self.assertQueriesDoNotGrow(6, lambda: self.count_queries('post', '/expense/filter', body()), self.add_data)
+
+    def test_filter_expenses_of_many_categories(self):
+        category_ids = [self.categories[0].id]
+
+        def add_data_and_categories():
+            self.add_data()
+            category_ids.extend([category.id for category in self.categories[1:]])
+
+        body = lambda: {'timeline': self.timeline(), 'category_id': category_ids}
+
+        self.assertQueriesDoNotGrow(5, lambda: self.count_queries('post', '/expense/filter', body()), add_data_and_categories)
+
+    def test_export_expenses(self):
+        with self.settings(EXPENSE_EXPORT_CHUNK_SIZE=1000):
+            self.assertQueriesDoNotGrow(2, lambda: self.count_queries('get', '/expense/export'), self.add_data)
+
+    def test_import_expenses(self):
+        rows = [self.expense_body(name=f'Imported {number}') for number in range(20)]
+
+        self.assertQueriesDoNotGrow(14, lambda: self.count_queries('post', '/expense/import', rows), self.add_data)
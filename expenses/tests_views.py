@@ -1,6 +1,10 @@
 import os
+import csv
+import io
+import json
 
-from django.test import TestCase
+from django.conf import settings
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 from categories.models import Category
@@ -83,6 +87,138 @@ class TestExpensesView(APITestCase):
     def setUp(self):
         self.endpoint = '/expense'
 
+    def test_user_reads_expenses_page_by_page(self):
+        for day in range(1, 6):
+            self.create_expense_with_response(100 + day, f'2022-05-0{day}', 2, f"Expense {day}", status.HTTP_201_CREATED)
+
+        self.create_expense_with_response(200, '2022-05-03', 2, "Another Expense 3", status.HTTP_201_CREATED)
+
+        response = self.client.get(self.endpoint, {'page_size': 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([expense['name'] for expense in response.json()], ['Expense 5', 'Expense 4', 'Another Expense 3', 'Expense 3'])
+
+        response = self.client.get(self.endpoint, {'page_size': 4, 'cursor': response['X-Next-Cursor']})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([expense['name'] for expense in response.json()], ['Expense 2', 'Expense 1'])
+        self.assertFalse(response.has_header('X-Next-Cursor'))
+
+    @override_settings(EXPENSE_PAGE_SIZE=2)
+    def test_user_reads_only_the_first_page_of_expenses_without_a_page_size_or_cursor(self):
+        for day in range(1, 4):
+            self.create_expense_with_response(100 + day, f'2022-05-0{day}', 2, f"Expense {day}", status.HTTP_201_CREATED)
+
+        response = self.client.get(self.endpoint)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([expense['name'] for expense in response.json()], ['Expense 3', 'Expense 2'])
+        self.assertTrue(response.has_header('X-Next-Cursor'))
+        self.assertIn('page_size=2', response['Link'])
+
+    def test_user_reads_expenses_with_invalid_cursor_or_page_size(self):
+        response = self.client.get(self.endpoint, {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(self.endpoint, {'page_size': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_reads_expenses_with_a_page_size_that_is_not_a_number(self):
+        response = self.client.get(self.endpoint, {'page_size': 'ten'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'message': f'page_size must be an integer between 1 and {settings.EXPENSE_MAX_PAGE_SIZE}'})
+
+    def test_user_reads_expenses_again_without_changes(self):
+        self.create_expense_with_response(100, '2022-05-01', 2, "An Expense", status.HTTP_201_CREATED)
+
+        response = self.get_expense_with_response(status.HTTP_200_OK)
+        etag = response['ETag']
+
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.endpoint, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.create_expense_with_response(200, '2022-05-02', 2, "Another Expense", status.HTTP_201_CREATED)
+
+        response = self.client.get(self.endpoint, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_user_exports_expenses_as_ndjson_and_csv(self):
+        self.create_expense_with_response(250.5, '2022-05-12', 2, "Last Expense of the month", status.HTTP_201_CREATED)
+        self.create_expense_with_response(100, '2022-05-01', 1, "First Expense of the month", status.HTTP_201_CREATED)
+
+        response = self.client.get(self.endpoint + '/export')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0])['value'], 250.5)
+        self.assertEqual(json.loads(lines[1])['name'], "First Expense of the month")
+
+        response = self.client.get(self.endpoint + '/export', {'file_format': 'csv'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['date'], '2022-05-12')
+        self.assertEqual(rows[1]['category_id'], '1')
+
+    def test_user_exports_expenses_in_unknown_format(self):
+        response = self.client.get(self.endpoint + '/export', {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_user_imports_expenses_from_json_array(self):
+        response = self.client.post(self.endpoint + '/import', [
+            {'name': 'Groceries', 'value': 250.5, 'category_id': 2, 'date': '2022-05-12'},
+            {'name': 'Taxes', 'value': 1000, 'category_id': 1, 'date': '2022-05-12'},
+            {'name': 'Inexistent category', 'value': 100, 'category_id': 4777, 'date': '2022-05-12'},
+            {'name': 'Negative', 'value': -100, 'category_id': 1, 'date': '2022-05-12'},
+            {'name': 'From the future', 'value': 100, 'category_id': 1, 'date': '2099-05-12'},
+        ], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [3, 4, 5])
+
+        response = self.get_expense_with_response(status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_user_imports_expenses_from_csv(self):
+        csv_content = "name,value,category_id,date\nGroceries,250.50,2,2022-05-12\nTaxes,1000,1,2022-05-13\n"
+
+        response = self.client.generic('POST', self.endpoint + '/import', csv_content, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+
+        csv_file = io.BytesIO(csv_content.encode('utf-8'))
+        csv_file.name = 'expenses.csv'
+
+        response = self.client.post(self.endpoint + '/import', {'file': csv_file}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 2)
+
+        response = self.get_expense_with_response(status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 4)
+
+    def test_user_imports_no_valid_expenses(self):
+        response = self.client.post(self.endpoint + '/import', [{'name': 'Incomplete'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.endpoint + '/import', {'name': 'Not an array'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_user_creates_expenses(self):
         self.create_expense_with_response(
             250.5, '2022-05-12', 2, "Last Expense of the month", status.HTTP_201_CREATED)
@@ -329,6 +465,18 @@ class TestExpensesView(APITestCase):
         self.assertExpenseInformationIsRight(
             json_response_three, 123456, '2022-06-02', 3, 'Another expense', False)
 
+    def test_user_reads_expenses_of_several_categories_sent_as_strings(self):
+        self.create_expense_with_response(10599, '2021-05-20', 1, "Very old expense", status.HTTP_201_CREATED)
+        self.create_expense_with_response(123456, '2022-06-02', 3, "Another expense", status.HTTP_201_CREATED)
+
+        response = self.filter_expenses_with_response(["2021-01-01", "2023-01-01"], ["3", "1"], status.HTTP_200_OK)
+
+        self.assertEqual([expense['category']['id'] for expense in response.json()], [3, 1])
+
+    def test_user_reads_expenses_of_categories_that_are_not_ids(self):
+        self.filter_expenses_with_response(["2021-01-01", "2023-01-01"], ["a category"], status.HTTP_400_BAD_REQUEST)
+        self.filter_expenses_with_response(["2021-01-01", "2023-01-01"], [{"id": 1}], status.HTTP_400_BAD_REQUEST)
+
     def test_user_reads_expenses_within_an_invalid_time_line(self):
         self.filter_expenses_with_response(["2025-01-01", "2020-01-01"], [1, 3], status.HTTP_400_BAD_REQUEST)
 
@@ -1,7 +1,9 @@
 from django.urls import path
-from .views import expense, expense_filter
+from .views import expense, expense_filter, expense_export, expense_import
 
 urlpatterns = [
     path('', expense),
-    path('/filter', expense_filter)
+    path('/filter', expense_filter),
+    path('/export', expense_export),
+    path('/import', expense_import)
 ]
@@ -1,9 +1,14 @@
 from collections.abc import Sequence
 
 from datetime import date, datetime
+from decimal import Decimal
+import csv
+import io
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import condition
 from django.core.serializers import serialize
+from django.conf import settings
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -13,6 +18,10 @@ from categories.models import Category
 from drf_yasg.utils import swagger_auto_schema
 
 from .models import Expense
+from .pagination import parse_page_size
+from .export import EXPORTERS, CONTENT_TYPES
+from walletify.conditional import data_version_of, user_data_etag
+from walletify.timing import JsonResponse
 
 
 def is_on_the_future_validation(new_date):
@@ -67,12 +76,33 @@ class GetExpenseSerializer(serializers.ModelSerializer):
         model = Expense
         fields = []
 
+class ImportExpenseSerializer(serializers.Serializer):
+    """
+    Validates one imported expense without touching the database. The ids of
+    the categories of the user are given once in context['category_ids'].
+    """
+    name = serializers.CharField(required=True, max_length=50)
+    value = serializers.DecimalField(required=True, max_digits=11, decimal_places=2, min_value=Decimal('0.01'))
+    category_id = serializers.IntegerField(required=True)
+    date = serializers.DateField(required=True)
+
+    def validate_category_id(self, category_id):
+        if category_id not in self.context['category_ids']:
+            raise serializers.ValidationError(f"Category {category_id} doesn't exist")
+        return category_id
+
+    def validate_date(self, new_date):
+        if new_date > date.today():
+            raise serializers.ValidationError('Future dates are not accepted')
+        return new_date
+
 # Create your views here.
 #@swagger_auto_schema(method='get', request_body=GetExpenseSerializer)
 @swagger_auto_schema(method='post', request_body=PostExpenseSerializer)
 @swagger_auto_schema(method='patch', request_body=PatchExpenseSerializer)
 @swagger_auto_schema(method='delete', request_body=DeleteExpenseSerializer)
 @api_view(['GET', 'POST', 'DELETE', 'PATCH'])
+@condition(etag_func=user_data_etag)
 def expense(request):
     request_body = request.META['body']
 
@@ -89,9 +119,21 @@ def expense(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     if request.method == 'GET':
-        user_expenses = Expense.expenses_from_user(request.META['user'])
-        expenses_as_dict = [expense.as_dict for expense in user_expenses]
-        return JsonResponse(expenses_as_dict, safe=False)
+        try:
+            page_size = parse_page_size(request.query_params.get('page_size'), settings.EXPENSE_PAGE_SIZE, settings.EXPENSE_MAX_PAGE_SIZE)
+            user_expenses, next_cursor = Expense.page_from_user(request.META['user'], page_size, request.query_params.get('cursor'))
+        except ValueError as e:
+            return Response({"message": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        categories_by_id = Category.catalog_by_id_of(request.META['user'], data_version_of(request))
+        expenses_as_dict = [expense.as_dict_from_catalog(categories_by_id) for expense in user_expenses]
+        response = JsonResponse(expenses_as_dict, safe=False)
+
+        if next_cursor is not None:
+            response['X-Next-Cursor'] = next_cursor
+            response['Link'] = f'<{request.path}?cursor={next_cursor}&page_size={page_size}>; rel="next"'
+
+        return response
 
     if request.method == 'POST':
         Expense.create_expense_for_user(
@@ -153,6 +195,7 @@ def expense_filter(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     response = []
+    categories_by_id = Category.catalog_by_id_of(request.META['user'], data_version_of(request))
     first_date = [int(string_piece) for string_piece in request_body["timeline"][0].split("-")]
     second_date = [int(string_piece) for string_piece in request_body["timeline"][1].split("-")]
 
@@ -163,20 +206,20 @@ def expense_filter(request):
             date(*second_date)
         )
 
-        response = [expense.as_dict for expense in expenses]
+        response = [expense.as_dict_from_catalog(categories_by_id) for expense in expenses]
     else:
-        if isinstance(request_body['category_id'], Sequence):
-            expenses = Expense.objects.none()
-
-            for category_id in request_body['category_id']:
-                expenses = Expense.filter_by_category_within_timeline_from_user(
-                request.META['user'],
-                date(*first_date),
-                date(*second_date),
-                Category.objects.get(id=category_id)
+        if isinstance(request_body['category_id'], Sequence) and not isinstance(request_body['category_id'], str):
+            try:
+                expenses = Expense.filter_by_categories_within_timeline_from_user(
+                    request.META['user'],
+                    date(*first_date),
+                    date(*second_date),
+                    request_body['category_id']
                 )
+            except (ValueError, TypeError):
+                return Response({"message": "category_id must be a category id or a list of category ids"}, status=status.HTTP_400_BAD_REQUEST)
 
-                response += [expense.as_dict for expense in expenses]
+            response = [expense.as_dict_from_catalog(categories_by_id) for expense in expenses]
 
         else:
             expenses = Expense.filter_by_category_within_timeline_from_user(
@@ -186,6 +229,69 @@ def expense_filter(request):
                 Category.objects.get(id=request_body['category_id'])
             )
 
-            response = [expense.as_dict for expense in expenses]
+            response = [expense.as_dict_from_catalog(categories_by_id) for expense in expenses]
 
     return JsonResponse(response, safe=False)
+
+
+@api_view(['GET'])
+def expense_export(request):
+    file_format = request.query_params.get('file_format', 'ndjson')
+
+    if file_format not in EXPORTERS:
+        return Response({"message": f"File format should be one of {', '.join(EXPORTERS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = Expense.export_rows_from_user(request.META['user'], settings.EXPENSE_EXPORT_CHUNK_SIZE)
+
+    response = StreamingHttpResponse(EXPORTERS[file_format](rows), content_type=CONTENT_TYPES[file_format])
+    response['Content-Disposition'] = f'attachment; filename="expenses.{file_format}"'
+
+    return response
+
+
+def rows_to_import(request):
+    media_type = request.content_type.split(';')[0].strip()
+
+    if media_type == 'text/csv':
+        return list(csv.DictReader(io.StringIO(request.body.decode('utf-8-sig'))))
+    elif media_type == 'multipart/form-data':
+        if 'file' not in request.FILES:
+            raise ValueError("A CSV file should be uploaded as 'file'")
+        return list(csv.DictReader(io.TextIOWrapper(request.FILES['file'], encoding='utf-8-sig')))
+    elif isinstance(request.META['body'], list):
+        return request.META['body']
+    else:
+        raise ValueError("Expenses should be sent as a JSON array or a CSV file")
+
+
+@api_view(['POST'])
+def expense_import(request):
+    try:
+        rows = rows_to_import(request)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return Response({"message": f"{e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(rows) == 0:
+        return Response({"message": "There are no expenses to import"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(rows) > settings.EXPENSE_IMPORT_MAX_ROWS:
+        return Response({"message": f"Up to {settings.EXPENSE_IMPORT_MAX_ROWS} expenses can be imported at once"}, status=status.HTTP_400_BAD_REQUEST)
+
+    context = {'category_ids': set(Category.catalog_by_id_of(request.META['user'], data_version_of(request)))}
+    valid_expenses = []
+    errors = []
+
+    for row_number, row in enumerate(rows, start=1):
+        serializer = ImportExpenseSerializer(data=row, context=context)
+
+        if serializer.is_valid():
+            valid_expenses.append(Expense(**serializer.validated_data))
+        else:
+            errors.append({'row': row_number, 'errors': serializer.errors})
+
+    Expense.bulk_create_for_user(request.META['user'], valid_expenses, settings.EXPENSE_IMPORT_BATCH_SIZE)
+
+    return Response({
+        'created': len(valid_expenses),
+        'errors': errors
+    }, status=status.HTTP_201_CREATED if len(valid_expenses) != 0 else status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,55 @@
+"""
+Production server configuration: gunicorn -c gunicorn.conf.py walletify.wsgi
+
+The application is preloaded once and forked into workers. Each worker
+starts the scheduler, opens its database connection, initializes Firebase
+and warms up before it accepts requests. Workers write their metrics to
+PROMETHEUS_MULTIPROC_DIR, and /metrics adds them up.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Read by prometheus_client when it is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'walletify-metrics'))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 1))
+preload_app = True
+timeout = int(os.environ.get('WEB_TIMEOUT', 30))
+keepalive = 5
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', 0))
+
+
+def on_starting(server):
+    # Files of the workers of a previous run would be added to the metrics
+    metrics_directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_directory, ignore_errors=True)
+    os.makedirs(metrics_directory)
+
+
+def pre_fork(server, worker):
+    from walletify.server import before_fork
+
+    before_fork()
+
+
+def post_fork(server, worker):
+    from walletify.server import after_fork
+
+    after_fork()
+
+
+def post_worker_init(worker):
+    from walletify.server import warm_up
+
+    warm_up()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
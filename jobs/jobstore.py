@@ -0,0 +1,102 @@
+import pickle
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.schedulers.base import STATE_STOPPED
+from django import db
+from django.db import transaction, IntegrityError
+
+from jobs.models import ScheduledJob
+
+
+class DjangoJobStore(BaseJobStore):
+    """
+    APScheduler job store backed by the ScheduledJob model, so jobs and their
+    next run times live in the project database, work on SQLite and Postgres
+    alike and survive restarts. Jobs are pickled like in APScheduler's own
+    SQLAlchemyJobStore.
+    """
+
+    def __init__(self, pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.pickle_protocol = pickle_protocol
+
+    def lookup_job(self, job_id):
+        job_state = ScheduledJob.objects.filter(id=job_id).values_list('job_state', flat=True).first()
+        return self._reconstitute_job(job_state) if job_state is not None else None
+
+    @property
+    def stopped(self):
+        # The scheduler thread processes jobs once more after shutdown, when there is nothing left to run
+        return self._scheduler is None or self._scheduler.state == STATE_STOPPED
+
+    def get_due_jobs(self, now):
+        if self.stopped:
+            return []
+
+        # Called from the scheduler thread, whose connection may have been closed by the database
+        db.close_old_connections()
+        return self._get_jobs(ScheduledJob.objects.filter(next_run_time__lte=now))
+
+    def get_next_run_time(self):
+        if self.stopped:
+            return None
+
+        db.close_old_connections()
+        return ScheduledJob.objects.filter(next_run_time__isnull=False).order_by('next_run_time').values_list('next_run_time', flat=True).first()
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs(ScheduledJob.objects.all())
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        try:
+            with transaction.atomic():
+                ScheduledJob.objects.create(id=job.id, next_run_time=job.next_run_time, job_state=self._job_state(job))
+        except IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        if ScheduledJob.objects.filter(id=job.id).update(next_run_time=job.next_run_time, job_state=self._job_state(job)) == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        deleted, _ = ScheduledJob.objects.filter(id=job_id).delete()
+
+        if deleted == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        ScheduledJob.objects.all().delete()
+
+    def _job_state(self, job):
+        return pickle.dumps(job.__getstate__(), self.pickle_protocol)
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(job_state)
+        job_state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, scheduled_jobs):
+        jobs = []
+        failed_job_ids = []
+
+        for job_id, job_state in scheduled_jobs.order_by('next_run_time').values_list('id', 'job_state'):
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.append(job_id)
+
+        if failed_job_ids:
+            ScheduledJob.objects.filter(id__in=failed_job_ids).delete()
+
+        return jobs
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}>'
@@ -0,0 +1,22 @@
+# Generated by Django 4.0.1 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('holder', models.CharField(max_length=200)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.0.1 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobRun',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('job_id', models.CharField(max_length=191)),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField(default=0)),
+                ('rows_scanned', models.PositiveIntegerField(default=0)),
+                ('emails_sent', models.PositiveIntegerField(default=0)),
+                ('failed', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.CharField(max_length=191, primary_key=True, serialize=False)),
+                ('next_run_time', models.DateTimeField(db_index=True, null=True)),
+                ('job_state', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='jobrun',
+            index=models.Index(fields=['job_id', '-started_at'], name='job_run_job_started_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+from django.db import models, transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+from datetime import timedelta
+import time
+import traceback
+
+
+# Create your models here.
+class SchedulerLease(models.Model):
+    """
+    Lease that elects the single process allowed to run scheduled jobs. The
+    holder renews it before it expires; once it expires any other process
+    can take it over. Both operations are a single conditional UPDATE, so
+    they are atomic on SQLite and Postgres alike.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    holder = models.CharField(max_length=200, null=False)
+    expires_at = models.DateTimeField(null=False)
+
+    @classmethod
+    def acquire(cls, name, holder, duration, now=None):
+        """Takes or renews the lease for duration seconds and returns whether holder has it."""
+        now = now if now is not None else timezone.now()
+        expires_at = now + timedelta(seconds=duration)
+
+        if cls.objects.filter(Q(holder=holder) | Q(expires_at__lt=now), name=name).update(holder=holder, expires_at=expires_at) == 1:
+            return True
+
+        try:
+            with transaction.atomic():
+                cls.objects.create(name=name, holder=holder, expires_at=expires_at)
+            return True
+        except IntegrityError:
+            # The lease exists and is held by another process
+            return False
+
+    @classmethod
+    def release(cls, name, holder):
+        cls.objects.filter(name=name, holder=holder).delete()
+
+
+class ScheduledJob(models.Model):
+    """APScheduler job pickled by jobs.jobstore.DjangoJobStore, so schedules survive restarts."""
+    id = models.CharField(max_length=191, primary_key=True)
+    next_run_time = models.DateTimeField(null=True, db_index=True) # None while the job is paused
+    job_state = models.BinaryField(null=False)
+
+
+class JobRun(models.Model):
+    """History of the runs of scheduled jobs, for capacity planning."""
+    class Meta:
+        indexes = [models.Index(fields=['job_id', '-started_at'], name='job_run_job_started_idx')]
+
+    id = models.AutoField(primary_key=True)
+    job_id = models.CharField(max_length=191, null=False)
+    started_at = models.DateTimeField(null=False)
+    duration = models.FloatField(default=0, null=False) # Seconds
+    rows_scanned = models.PositiveIntegerField(default=0, null=False)
+    emails_sent = models.PositiveIntegerField(default=0, null=False)
+    failed = models.BooleanField(default=False, null=False)
+    error = models.TextField(blank=True, default='')
+
+    @classmethod
+    def record(cls, job_id, function, *args, **kwargs):
+        """
+        Runs function and stores how long it took and the rows_scanned and
+        emails_sent of the dictionary it returns. Failures are stored with
+        their traceback and raised again.
+        """
+        run = cls(job_id=job_id, started_at=timezone.now())
+        started_at = time.monotonic()
+
+        try:
+            metrics = function(*args, **kwargs) or {}
+            run.rows_scanned = metrics.get('rows_scanned', 0)
+            run.emails_sent = metrics.get('emails_sent', 0)
+            return metrics
+        except Exception:
+            run.failed = True
+            run.error = traceback.format_exc()
+            raise
+        finally:
+            run.duration = time.monotonic() - started_at
+            run.save()
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from walletify.scheduler import schedule_job, run_notify_expiration_expenses
+from .jobstore import DjangoJobStore
+from .models import ScheduledJob
+
+
+# Create your tests here.
+class TestDjangoJobStore(TestCase):
+    def setUp(self):
+        self.jobstore = DjangoJobStore()
+        self.scheduler = BackgroundScheduler(jobstores={'default': self.jobstore})
+        self.scheduler.start(paused=True)
+
+    def tearDown(self):
+        self.scheduler.shutdown(wait=False)
+
+    def schedule_daily_job(self, hour='14'):
+        schedule_job(self.scheduler, run_notify_expiration_expenses, CronTrigger(hour=hour, minute='00'), 'a-job')
+
+    def test_jobs_are_stored_in_the_database(self):
+        self.schedule_daily_job()
+
+        job = self.scheduler.get_job('a-job')
+
+        self.assertEqual(ScheduledJob.objects.count(), 1)
+        self.assertEqual(job.func, run_notify_expiration_expenses)
+        self.assertEqual(job.misfire_grace_time, settings.SCHEDULER_MISFIRE_GRACE_TIME)
+        self.assertEqual(job.coalesce, settings.SCHEDULER_COALESCE)
+
+    def test_missed_run_is_kept_when_the_job_is_scheduled_again(self):
+        self.schedule_daily_job()
+
+        missed_run_time = timezone.now() - timedelta(hours=1)
+        self.scheduler.modify_job('a-job', next_run_time=missed_run_time)
+
+        # What a new leader does after a restart
+        self.schedule_daily_job()
+
+        self.assertEqual(self.scheduler.get_job('a-job').next_run_time, missed_run_time)
+        self.assertEqual([job.id for job in self.jobstore.get_due_jobs(timezone.now())], ['a-job'])
+
+    def test_job_with_a_changed_trigger_is_replaced(self):
+        self.schedule_daily_job()
+        self.schedule_daily_job(hour='15')
+
+        self.assertEqual(ScheduledJob.objects.count(), 1)
+        self.assertEqual(self.scheduler.get_job('a-job').next_run_time.hour, 15)
+
+    def test_removed_job_is_deleted_from_the_database(self):
+        self.schedule_daily_job()
+        self.scheduler.remove_job('a-job')
+
+        self.assertFalse(ScheduledJob.objects.exists())
+        self.assertIsNone(self.jobstore.get_next_run_time())
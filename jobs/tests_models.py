@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import SchedulerLease, JobRun
+
+
+# Create your tests here.
+class TestSchedulerLease(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_only_one_holder_gets_the_lease(self):
+        self.assertTrue(SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now))
+        self.assertFalse(SchedulerLease.acquire('a-lease', 'another-process', 30, now=self.now))
+
+    def test_holder_renews_its_lease(self):
+        SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now)
+
+        self.assertTrue(SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now + timedelta(seconds=20)))
+        self.assertFalse(SchedulerLease.acquire('a-lease', 'another-process', 30, now=self.now + timedelta(seconds=40)))
+        self.assertEqual(SchedulerLease.objects.get(name='a-lease').expires_at, self.now + timedelta(seconds=50))
+
+    def test_expired_lease_is_taken_over(self):
+        SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now)
+
+        self.assertTrue(SchedulerLease.acquire('a-lease', 'another-process', 30, now=self.now + timedelta(seconds=31)))
+        self.assertFalse(SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now + timedelta(seconds=32)))
+
+    def test_released_lease_is_taken_at_once(self):
+        SchedulerLease.acquire('a-lease', 'a-process', 30, now=self.now)
+        SchedulerLease.release('a-lease', 'another-process')
+        self.assertFalse(SchedulerLease.acquire('a-lease', 'another-process', 30, now=self.now))
+
+        SchedulerLease.release('a-lease', 'a-process')
+        self.assertTrue(SchedulerLease.acquire('a-lease', 'another-process', 30, now=self.now))
+
+
+class TestJobRun(TestCase):
+    def test_successful_run_is_recorded_with_its_metrics(self):
+        metrics = JobRun.record('a-job', lambda: {'rows_scanned': 30, 'emails_sent': 12})
+
+        run = JobRun.objects.get(job_id='a-job')
+
+        self.assertEqual(metrics, {'rows_scanned': 30, 'emails_sent': 12})
+        self.assertEqual((run.rows_scanned, run.emails_sent, run.failed), (30, 12, False))
+        self.assertGreaterEqual(run.duration, 0)
+
+    def test_failed_run_is_recorded_and_raised(self):
+        def failing_job():
+            raise ConnectionError("SMTP server is down")
+
+        with self.assertRaises(ConnectionError):
+            JobRun.record('a-job', failing_job)
+
+        run = JobRun.objects.get(job_id='a-job')
+
+        self.assertTrue(run.failed)
+        self.assertIn("SMTP server is down", run.error)
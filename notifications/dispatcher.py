@@ -0,0 +1,136 @@
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+from django import db
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from notifications.models import Notification
+
+logger = logging.getLogger(__name__)
+
+# Longest wait, in seconds, before claiming again after losing every row of a claim to other dispatchers
+CLAIM_RACE_BACKOFF = 0.05
+
+
+class RateLimiter:
+    """Spaces calls to wait() so that at most rate of them return per second, across threads. 0 is unlimited."""
+
+    def __init__(self, rate, timer=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.timer = timer
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.next_slot = 0
+
+    def wait(self):
+        if self.interval == 0:
+            return
+
+        with self.lock:
+            now = self.timer()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            self.sleep(slot - now)
+
+
+def reminder_email(notifications):
+    """One email per user with every notification claimed for them."""
+    string_email = "¡ACUERDATE DE PAGAR!" + '\n\n' + "Recuerda que se vence los siguientes pagos: "
+
+    for notification in notifications:
+        string_email += '\n\n' + "-Nombre de gasto futuro:" + notification.name + '\n\n' + 'Valor: ' + str(notification.value) + '\n\n' + 'Fecha de vencimiento: ' + str(notification.due_date) + '\n\n' + 'Categoría: ' + notification.category_name
+
+    return EmailMessage(
+        '[IMPORTANTE] ¡ACUERDATE DE PAGAR!',
+        string_email + '\n\n\n\n' + '¡Gracias por usar Walletify!',
+        'notifications@walletify.com',
+        [notifications[0].email],
+    )
+
+
+def drain(rate_limiter, batch_size, max_attempts, retry_backoff, claim_timeout):
+    """
+    Claims and sends batches of due notifications over one SMTP connection
+    until none is due. A failed email is retried later without stopping
+    the ones after it.
+    """
+    claim_token = uuid.uuid4().hex
+    stats = {'emails_sent': 0, 'notifications_sent': 0, 'retried': 0, 'failed': 0}
+    connection = get_connection()
+
+    try:
+        while True:
+            batch = Notification.claim(claim_token, batch_size, claim_timeout)
+
+            if len(batch) == 0:
+                # Another dispatcher may have won the race for these rows while others are still due
+                if not Notification.is_any_due():
+                    return stats
+
+                # Jittered, so dispatchers that lost the same race do not claim again in lockstep
+                time.sleep(random.uniform(0, CLAIM_RACE_BACKOFF))
+                continue
+
+            for _, notifications in groupby(batch, key=lambda notification: notification.user_id):
+                notifications = list(notifications)
+                rate_limiter.wait()
+
+                try:
+                    # Opens the connection again after a failure, a no-op while it is open
+                    connection.open()
+                    connection.send_messages([reminder_email(notifications)])
+                except Exception as error:
+                    logger.warning("Reminder to %s could not be sent: %s", notifications[0].email, error)
+                    connection.close()
+
+                    failed = Notification.retry_later(notifications, error, max_attempts, retry_backoff)
+                    stats['failed'] += failed
+                    stats['retried'] += len(notifications) - failed
+                else:
+                    Notification.mark_sent(notifications)
+                    stats['emails_sent'] += 1
+                    stats['notifications_sent'] += len(notifications)
+    finally:
+        connection.close()
+
+
+def drain_in_pool(*args):
+    # Pool threads open their own database connections, closed once they are done
+    try:
+        return drain(*args)
+    finally:
+        db.connections.close_all()
+
+
+def dispatch_notifications(workers=None, batch_size=None, rate_limit=None, max_attempts=None, retry_backoff=None, claim_timeout=None):
+    """
+    Sends every due notification with workers threads that share one rate
+    limiter, and returns how many emails and notifications were sent,
+    retried and given up on. Arguments default to the NOTIFICATION_* settings.
+    """
+    workers = workers if workers is not None else settings.NOTIFICATION_WORKERS
+    rate_limiter = RateLimiter(rate_limit if rate_limit is not None else settings.NOTIFICATION_RATE_LIMIT)
+    args = (
+        rate_limiter,
+        batch_size if batch_size is not None else settings.NOTIFICATION_DISPATCH_BATCH_SIZE,
+        max_attempts if max_attempts is not None else settings.NOTIFICATION_MAX_ATTEMPTS,
+        retry_backoff if retry_backoff is not None else settings.NOTIFICATION_RETRY_BACKOFF,
+        claim_timeout if claim_timeout is not None else settings.NOTIFICATION_CLAIM_TIMEOUT,
+    )
+
+    if workers <= 1:
+        all_stats = [drain(*args)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='notifications') as executor:
+            futures = [executor.submit(drain_in_pool, *args) for _ in range(workers)]
+            all_stats = [future.result() for future in futures]
+
+    return {key: sum([stats[key] for stats in all_stats]) for key in all_stats[0]}
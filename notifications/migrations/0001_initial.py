@@ -0,0 +1,45 @@
+# Generated by Django 4.0.1 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0003_user_data_version'),
+        ('budgets', '0004_futureexpensedetail_future_expense_expiration_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('due_date', models.DateField()),
+                ('email', models.CharField(max_length=320)),
+                ('name', models.CharField(max_length=50, null=True)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('category_name', models.CharField(max_length=50)),
+                ('status', models.CharField(default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('claim_token', models.CharField(blank=True, default='', max_length=32)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(null=True)),
+                ('future_expense', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='budgets.futureexpensedetail')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.user')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'future_expense', 'due_date'), name='notification_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+from django.db import models, transaction
+from django.utils import timezone
+from datetime import timedelta
+
+from users.models import User
+from budgets.models import FutureExpenseDetail
+
+
+# Create your models here.
+class Notification(models.Model):
+    """
+    Outbox row of a reminder about a future expense. The daily scan inserts
+    them and a dispatcher sends them, so (user, future_expense, due_date) is
+    an idempotency key: rerunning the scan never queues a reminder twice.
+    The email is built from a copy of the future expense taken at scan time.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'future_expense', 'due_date'], name='notification_idempotency_key')]
+        indexes = [models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx')]
+
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=False)
+    future_expense = models.ForeignKey(FutureExpenseDetail, on_delete=models.CASCADE, null=False)
+    due_date = models.DateField(null=False)
+
+    email = models.CharField(max_length=320, null=False)
+    name = models.CharField(max_length=50, null=True)
+    value = models.DecimalField(max_digits=11, decimal_places=2, null=False)
+    category_name = models.CharField(max_length=50, null=False)
+
+    status = models.CharField(max_length=10, default=PENDING, null=False)
+    attempts = models.PositiveIntegerField(default=0, null=False)
+    next_attempt_at = models.DateTimeField(null=False)
+    claim_token = models.CharField(max_length=32, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True)
+
+    @classmethod
+    def enqueue(cls, future_expense_details, now=None):
+        """Queues a reminder for each detail, with budget, user and category already loaded. Queued ones are skipped."""
+        now = now if now is not None else timezone.now()
+
+        cls.objects.bulk_create([
+            cls(
+                user_id=detail.assigned_budget.user_id,
+                future_expense_id=detail.id,
+                due_date=detail.expiration_date,
+                email=detail.assigned_budget.user.email,
+                name=detail.name,
+                value=detail.value,
+                category_name=detail.category.name,
+                next_attempt_at=now
+            )
+            for detail in future_expense_details
+        ], ignore_conflicts=True)
+
+    @classmethod
+    def due(cls, now=None):
+        now = now if now is not None else timezone.now()
+        return cls.objects.filter(status=cls.PENDING, next_attempt_at__lte=now)
+
+    @classmethod
+    def is_any_due(cls, now=None):
+        return cls.due(now).exists()
+
+    @classmethod
+    def claim(cls, claim_token, batch_size, claim_timeout, now=None):
+        """
+        Claims up to batch_size due notifications for claim_token and returns
+        them ordered by user. Claiming moves next_attempt_at claim_timeout
+        seconds ahead. The due rows are locked while they are claimed, and
+        rows locked by another dispatcher are skipped, so concurrent
+        dispatchers claim different rows. Rows of a dispatcher that died are
+        claimed again once the timeout passes. Databases without row locks
+        rely on the conditional UPDATE, so a claim that loses a race can be
+        empty while due rows remain.
+        """
+        now = now if now is not None else timezone.now()
+
+        with transaction.atomic():
+            due_ids = list(cls.due(now).select_for_update(skip_locked=True).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+
+            cls.due(now).filter(id__in=due_ids).update(
+                claim_token=claim_token,
+                next_attempt_at=now + timedelta(seconds=claim_timeout)
+            )
+
+        return list(cls.objects.filter(id__in=due_ids, claim_token=claim_token).order_by('user_id', 'id'))
+
+    @classmethod
+    def mark_sent(cls, notifications, now=None):
+        cls.objects.filter(id__in=[notification.id for notification in notifications]).update(
+            status=cls.SENT,
+            sent_at=now if now is not None else timezone.now(),
+            claim_token=''
+        )
+
+    @classmethod
+    def retry_later(cls, notifications, error, max_attempts, retry_backoff, now=None):
+        """
+        Schedules another attempt retry_backoff seconds later, doubled on every
+        attempt, or gives up after max_attempts. Returns how many gave up.
+        """
+        now = now if now is not None else timezone.now()
+        failed = 0
+
+        for notification in notifications:
+            notification.attempts += 1
+            notification.last_error = str(error)
+            notification.claim_token = ''
+
+            if notification.attempts >= max_attempts:
+                notification.status = cls.FAILED
+                failed += 1
+            else:
+                notification.next_attempt_at = now + timedelta(seconds=retry_backoff * 2 ** (notification.attempts - 1))
+
+            notification.save(update_fields=['attempts', 'last_error', 'claim_token', 'status', 'next_attempt_at'])
+
+        return failed
@@ -0,0 +1,185 @@
+import threading
+import time
+from datetime import date, timedelta
+from smtplib import SMTPRecipientsRefused
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from budgets.models import Budget
+from categories.models import Category
+from users.models import User
+from . import dispatcher
+from .dispatcher import dispatch_notifications, RateLimiter
+from .models import Notification
+
+REFUSED_RECIPIENTS = set()
+
+
+class RefusingEmailBackend(EmailBackend):
+    """Locmem backend that refuses the recipients in REFUSED_RECIPIENTS."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0] in REFUSED_RECIPIENTS:
+                raise SMTPRecipientsRefused({message.to[0]: (550, b'Mailbox unavailable')})
+
+        return super().send_messages(messages)
+
+
+class SlowEmailBackend(EmailBackend):
+    """Locmem backend that takes a while to send, like SMTP, and records which thread sent each message."""
+
+    senders = []
+
+    def send_messages(self, messages):
+        time.sleep(0.02)
+        self.senders.extend([(threading.current_thread().name, message.to[0]) for message in messages])
+        return super().send_messages(messages)
+
+
+# Create your tests here.
+@override_settings(EMAIL_BACKEND='notifications.tests_dispatcher.RefusingEmailBackend')
+class TestDispatchNotifications(TestCase):
+    def setUp(self):
+        REFUSED_RECIPIENTS.clear()
+        self.a_category = Category.objects.all()[0]
+        self.due_date = date.today() + timedelta(days=3)
+
+    def queue_reminders_for(self, firebase_uid, email, *names):
+        user = User.objects.create(firebase_uid=firebase_uid, email=email)
+        budget = Budget.objects.create(user=user, initial_date=date.today(), final_date=date.today() + timedelta(days=30))
+
+        Notification.enqueue([budget.add_future_expense(self.a_category, 100, name, self.due_date) for name in names])
+
+    def dispatch(self, **kwargs):
+        return dispatch_notifications(**{'workers': 1, 'batch_size': 10, 'rate_limit': 0, 'max_attempts': 2, 'retry_backoff': 60, 'claim_timeout': 300, **kwargs})
+
+    def test_each_user_gets_one_email_with_all_reminders(self):
+        self.queue_reminders_for('randomrandomrandomrandomrand', 'random@random.com', 'Rent', 'Gas Bill')
+        self.queue_reminders_for('stalestalestalestalestalesta', 'stale@random.com', 'Water Bill')
+
+        stats = self.dispatch()
+
+        emails_by_recipient = {email.to[0]: email.body for email in mail.outbox}
+
+        self.assertEqual(stats, {'emails_sent': 2, 'notifications_sent': 3, 'retried': 0, 'failed': 0})
+        self.assertIn('Rent', emails_by_recipient['random@random.com'])
+        self.assertIn('Gas Bill', emails_by_recipient['random@random.com'])
+        self.assertIn('Water Bill', emails_by_recipient['stale@random.com'])
+        self.assertEqual(Notification.objects.filter(status=Notification.SENT).count(), 3)
+
+        self.assertEqual(self.dispatch()['emails_sent'], 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_refused_email_is_retried_later_without_stopping_the_others(self):
+        self.queue_reminders_for('randomrandomrandomrandomrand', 'random@random.com', 'Rent')
+        self.queue_reminders_for('stalestalestalestalestalesta', 'stale@random.com', 'Water Bill')
+        REFUSED_RECIPIENTS.add('random@random.com')
+
+        stats = self.dispatch()
+
+        refused = Notification.objects.get(email='random@random.com')
+
+        self.assertEqual(stats, {'emails_sent': 1, 'notifications_sent': 1, 'retried': 1, 'failed': 0})
+        self.assertEqual([email.to[0] for email in mail.outbox], ['stale@random.com'])
+        self.assertEqual((refused.status, refused.attempts), (Notification.PENDING, 1))
+        self.assertGreater(refused.next_attempt_at, timezone.now() + timedelta(seconds=59))
+
+        # Not due again until the backoff passes
+        self.assertEqual(self.dispatch()['retried'], 0)
+
+        Notification.objects.filter(id=refused.id).update(next_attempt_at=timezone.now())
+
+        self.assertEqual(self.dispatch()['failed'], 1)
+        self.assertEqual(Notification.objects.get(id=refused.id).status, Notification.FAILED)
+
+    def test_dispatcher_keeps_draining_after_losing_a_claim_race(self):
+        self.queue_reminders_for('randomrandomrandomrandomrand', 'random@random.com', 'Rent')
+        claim = Notification.claim
+        claims = []
+
+        def claim_after_losing_a_race(*args):
+            # Another dispatcher got the rows of the first claim, while others are still due
+            claims.append(args)
+            return [] if len(claims) == 1 else claim(*args)
+
+        with mock.patch.object(Notification, 'claim', claim_after_losing_a_race), mock.patch.object(dispatcher.time, 'sleep') as sleep:
+            stats = self.dispatch()
+
+        # It waits before claiming again instead of spinning
+        sleep.assert_called_once()
+        self.assertLessEqual(0, sleep.call_args.args[0])
+        self.assertLessEqual(sleep.call_args.args[0], dispatcher.CLAIM_RACE_BACKOFF)
+        self.assertEqual(stats['notifications_sent'], 1)
+        self.assertEqual([email.to[0] for email in mail.outbox], ['random@random.com'])
+
+    def test_claimed_notifications_are_not_claimed_again(self):
+        self.queue_reminders_for('randomrandomrandomrandomrand', 'random@random.com', 'Rent', 'Gas Bill', 'Water Bill')
+
+        claimed = Notification.claim('a-dispatcher', 2, 300)
+        claimed_by_another = Notification.claim('another-dispatcher', 2, 300)
+
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(len(claimed_by_another), 1)
+        self.assertFalse(set(claimed) & set(claimed_by_another))
+
+
+@override_settings(EMAIL_BACKEND='notifications.tests_dispatcher.SlowEmailBackend')
+class TestParallelDispatch(TransactionTestCase):
+    # Pool threads open their own database connections, so the data has to be committed
+    serialized_rollback = True
+
+    def test_every_worker_sends_and_every_notification_is_sent_once(self):
+        SlowEmailBackend.senders.clear()
+        a_category = Category.objects.all()[0]
+        due_date = date.today() + timedelta(days=3)
+
+        for number in range(12):
+            user = User.objects.create(firebase_uid=f'randomrandomrandomrandomra{number:02d}', email=f'{number}@random.com')
+            budget = Budget.objects.create(user=user, initial_date=date.today(), final_date=date.today() + timedelta(days=30))
+            Notification.enqueue([budget.add_future_expense(a_category, 100, 'Rent', due_date)])
+
+        # The in-memory test database fails concurrent writes instead of waiting for
+        # their locks, so the queries of the workers take turns while emails overlap
+        database_lock = threading.Lock()
+
+        def taking_turns(method):
+            def call(*args, **kwargs):
+                with database_lock:
+                    return method(*args, **kwargs)
+
+            return call
+
+        with mock.patch.multiple(Notification, **{name: taking_turns(getattr(Notification, name)) for name in ['claim', 'is_any_due', 'mark_sent', 'retry_later']}):
+            stats = dispatch_notifications(workers=3, batch_size=1, rate_limit=0, max_attempts=2, retry_backoff=60, claim_timeout=300)
+
+        recipients = sorted([recipient for _, recipient in SlowEmailBackend.senders])
+
+        self.assertEqual(stats['notifications_sent'], 12)
+        self.assertEqual(recipients, sorted([f'{number}@random.com' for number in range(12)]))
+        self.assertEqual(len({sender for sender, _ in SlowEmailBackend.senders}), 3)
+        self.assertEqual(Notification.objects.filter(status=Notification.SENT).count(), 12)
+
+
+class TestRateLimiter(TestCase):
+    def test_calls_are_spaced_by_the_rate(self):
+        now, sleeps = [0.0], []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        rate_limiter = RateLimiter(4, timer=lambda: now[0], sleep=sleep)
+
+        for _ in range(3):
+            rate_limiter.wait()
+
+        self.assertEqual(sleeps, [0.25, 0.25])
+
+    def test_zero_rate_is_unlimited(self):
+        rate_limiter = RateLimiter(0, sleep=lambda seconds: self.fail("Unlimited rate should not sleep"))
+        rate_limiter.wait()
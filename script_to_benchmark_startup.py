@@ -0,0 +1,43 @@
+"""
+Measures how long a fresh interpreter takes to import walletify.settings and
+to run django.setup(), as the median of several runs:
+
+    python script_to_benchmark_startup.py [runs]
+
+The FIREBASE_* environment variables have to be set, as for the server.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+CHILD = '''
+import os, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'walletify.settings')
+started_at = time.perf_counter()
+import walletify.settings
+imported_at = time.perf_counter()
+import django
+django.setup()
+print(imported_at - started_at, time.perf_counter() - started_at)
+'''
+
+
+def measure(runs):
+    settings_times, setup_times = [], []
+
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', CHILD], check=True, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        settings_time, setup_time = [float(value) for value in output.split()]
+        settings_times.append(settings_time)
+        setup_times.append(setup_time)
+
+    return statistics.median(settings_times), statistics.median(setup_times)
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    settings_time, setup_time = measure(runs)
+
+    print(f"import walletify.settings: {settings_time * 1000:.1f} ms (median of {runs} runs)")
+    print(f"django.setup():            {setup_time * 1000:.1f} ms (median of {runs} runs)")
@@ -0,0 +1,23 @@
+import threading
+
+from cachetools import TTLCache
+
+
+class UserCache:
+    """In-process cache of users by Firebase UID, each entry living ttl seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.users = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = threading.Lock()
+
+    def get(self, firebase_uid):
+        with self.lock:
+            return self.users.get(firebase_uid)
+
+    def put(self, user):
+        with self.lock:
+            self.users[user.firebase_uid] = user
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
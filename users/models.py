@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Value
+from django.db.models.functions import Concat
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 
 from users.constants import FIREBASE_UID_LENGTH
@@ -21,3 +23,51 @@ class User(models.Model):
         validators=[MaxLengthValidator(320)],
         null=False
     ) # Maximum Email length is here https://www.lifewire.com/is-email-address-length-limited-1171110
+
+    data_version = models.PositiveBigIntegerField(default=0, null=False) # Bumped by every write to the user's data
+
+    @classmethod
+    def from_firebase(cls, firebase_uid, email):
+        """
+        User of a verified Firebase token, created on its first request. An
+        existing user costs one query on the firebase_uid unique index. Firebase
+        is the source of truth for emails, so a changed email is updated and
+        released first from any stale user that still holds it.
+        """
+        user = cls.objects.filter(firebase_uid=firebase_uid).first()
+
+        if user is None:
+            try:
+                with transaction.atomic():
+                    cls.release_email(email, firebase_uid)
+                    return cls.objects.create(firebase_uid=firebase_uid, email=email)
+            except IntegrityError:
+                # The same user was created by a concurrent request
+                user = cls.objects.get(firebase_uid=firebase_uid)
+
+        if user.email != email:
+            with transaction.atomic():
+                cls.release_email(email, firebase_uid)
+                user.email = email
+                user.save(update_fields=['email'])
+
+        return user
+
+    @classmethod
+    def release_email(cls, email, firebase_uid):
+        cls.objects.filter(email=email).exclude(firebase_uid=firebase_uid).update(
+            email=Concat(Value('released:'), 'firebase_uid')
+        )
+
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """Increments the data version of the user, or of every user for None (e.g. static categories)."""
+        cls.bump_data_versions(cls.objects.all() if user_id is None else cls.objects.filter(pk=user_id))
+
+    @classmethod
+    def bump_data_versions(cls, users):
+        users.update(data_version=F('data_version') + 1)
+
+    @classmethod
+    def data_version_of(cls, user_id):
+        return cls.objects.filter(pk=user_id).values_list('data_version', flat=True).first()
@@ -0,0 +1,49 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+
+from users.models import User
+
+deferred_bumps = threading.local()
+
+
+def track_data_version(model, users_of):
+    """
+    Bumps the data version of the owners of every saved or deleted instance
+    of model. users_of returns them as a User queryset, so details can be
+    matched through their budget without loading it, even while a cascade is
+    deleting it.
+    """
+    def bump_data_version(sender, instance, **kwargs):
+        if getattr(deferred_bumps, 'depth', 0) == 0:
+            User.bump_data_versions(users_of(instance))
+
+    post_save.connect(bump_data_version, sender=model, weak=False, dispatch_uid=f'data_version_{model.__name__}_save')
+    post_delete.connect(bump_data_version, sender=model, weak=False, dispatch_uid=f'data_version_{model.__name__}_delete')
+
+
+def owner_of(instance):
+    """Owner of instances with a user, or every user for the static ones without it."""
+    return User.objects.all() if instance.user_id is None else User.objects.filter(pk=instance.user_id)
+
+
+def owner_of_budget_of(detail):
+    return User.objects.filter(budget__id=detail.assigned_budget_id)
+
+
+@contextmanager
+def single_data_version_bump(users):
+    """
+    Bumps the data version of users once for everything saved or deleted in
+    the block, e.g. by a delete cascade, instead of once per instance. users
+    must own all of it.
+    """
+    deferred_bumps.depth = getattr(deferred_bumps, 'depth', 0) + 1
+
+    try:
+        yield
+    finally:
+        deferred_bumps.depth -= 1
+
+    User.bump_data_versions(users)
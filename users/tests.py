@@ -1,4 +1,61 @@
+from datetime import date, timedelta
+
 from django.test import TestCase
 
+from users.models import User
+from categories.models import Category
+from budgets.models import Budget
+
 
 # Create your tests here.
+class TestUsersModel(TestCase):
+    def test_user_is_created_on_first_request(self):
+        user = User.from_firebase('randomrandomrandomrandomrand', 'random@random.com')
+
+        self.assertEqual(User.objects.get(firebase_uid='randomrandomrandomrandomrand'), user)
+
+    def test_existing_user_is_resolved_with_one_query(self):
+        user = User.objects.create(firebase_uid='randomrandomrandomrandomrand', email='random@random.com')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(User.from_firebase('randomrandomrandomrandomrand', 'random@random.com'), user)
+
+    def test_user_email_is_updated_when_it_changes(self):
+        user = User.objects.create(firebase_uid='randomrandomrandomrandomrand', email='random@random.com')
+
+        User.from_firebase('randomrandomrandomrandomrand', 'another@random.com')
+
+        user.refresh_from_db()
+        self.assertEqual(user.email, 'another@random.com')
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_email_of_a_stale_user_is_released(self):
+        stale_user = User.objects.create(firebase_uid='stalestalestalestalestalesta', email='random@random.com')
+
+        user = User.from_firebase('randomrandomrandomrandomrand', 'random@random.com')
+
+        stale_user.refresh_from_db()
+        self.assertEqual(user.email, 'random@random.com')
+        self.assertEqual(stale_user.email, 'released:stalestalestalestalestalesta')
+
+    def test_data_version_is_bumped_by_writes_to_user_data(self):
+        user = User.objects.create(firebase_uid='randomrandomrandomrandomrand', email='random@random.com')
+        another_user = User.objects.create(firebase_uid='stalestalestalestalestalesta', email='stale@random.com')
+
+        category = Category.create_category_for_user(user, name='A Category', material_ui_icon_name='Home')
+        category.delete()
+
+        self.assertEqual(User.data_version_of(user.id), 2)
+        self.assertEqual(User.data_version_of(another_user.id), 0)
+
+    def test_data_version_is_bumped_once_by_a_delete_cascade(self):
+        user = User.objects.create(firebase_uid='randomrandomrandomrandomrand', email='random@random.com')
+        budget = Budget.objects.create(user=user, initial_date=date.today() + timedelta(days=1), final_date=date.today() + timedelta(days=31))
+
+        for category in Category.objects.all()[:3]:
+            budget.add_limit(category, 100)
+
+        data_version = User.data_version_of(user.id)
+        budget.delete()
+
+        self.assertEqual(User.data_version_of(user.id), data_version + 1)
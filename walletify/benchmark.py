@@ -0,0 +1,331 @@
+import json
+import os
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from itertools import cycle
+
+from django import db
+from django.test import Client
+
+BENCHMARK_PROJECT_ID = 'walletify-benchmark'
+BENCHMARK_KEY_ID = 'benchmark-key'
+DEV_USER_UID = 'randomrandomrandomrandomrand'
+DEV_USER_EMAIL = 'random@random.com'
+
+
+class Endpoint:
+    """A route driven by the benchmark. body returns the JSON body of a request of a user, or None to skip it."""
+
+    def __init__(self, name, method, path, body=None, read_only=True):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body if body is not None else (lambda user: None)
+        self.read_only = read_only
+
+
+def filter_body(user):
+    return {'timeline': [(date.today() - timedelta(days=30)).isoformat(), date.today().isoformat()]}
+
+
+def filter_by_category_body(user):
+    from categories.models import Category
+
+    return {**filter_body(user), 'category_id': list(Category.static_categories().order_by('id').values_list('id', flat=True)[:3])}
+
+
+class FutureExpensesToExpend:
+    """Unexpended future expenses of the current budgets, each one handed out once since expending it is a write."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids_by_user = None
+
+    def __call__(self, user):
+        from budgets.models import FutureExpenseDetail
+
+        with self.lock:
+            if self.ids_by_user is None:
+                self.ids_by_user = {}
+                details = FutureExpenseDetail.objects.filter(
+                    expended=False,
+                    assigned_budget__initial_date__lte=date.today(),
+                    assigned_budget__final_date__gte=date.today()
+                ).values_list('assigned_budget__user_id', 'id')
+
+                for user_id, detail_id in details.iterator():
+                    self.ids_by_user.setdefault(user_id, []).append(detail_id)
+
+            ids = self.ids_by_user.get(user.id, [])
+
+            if len(ids) == 0:
+                return None
+
+            return {'future_expense_id': ids.pop(), 'expense_done_date': date.today().isoformat()}
+
+
+def default_endpoints():
+    """Every route of walletify/urls.py that reads or changes the data of a user, except the file export and import."""
+    return [
+        Endpoint('expense', 'get', '/expense'),
+        Endpoint('expense_filter', 'post', '/expense/filter', filter_body),
+        Endpoint('expense_filter_by_category', 'post', '/expense/filter', filter_by_category_body),
+        Endpoint('category', 'get', '/category'),
+        Endpoint('budget', 'get', '/budget'),
+        Endpoint('budget_current', 'get', '/budget/current'),
+        Endpoint('budget_expended', 'patch', '/budget/expended', FutureExpensesToExpend(), read_only=False),
+    ]
+
+
+class LocalTokenIssuer:
+    """
+    Signs Firebase-like ID tokens with a local key pair and installs a token
+    verifier that trusts it, so requests go through the real verification
+    path as many different users without calling Firebase.
+    """
+
+    def __init__(self, key_size=2048):
+        import rsa
+        from google.auth import crypt
+        from walletify.firebase_certs import CertificateStore, StaticCertificateSource, TokenVerifier
+
+        public_key, private_key = rsa.newkeys(key_size)
+        self.signer = crypt.RSASigner.from_string(private_key.save_pkcs1(), key_id=BENCHMARK_KEY_ID)
+        source = StaticCertificateSource({BENCHMARK_KEY_ID: public_key.save_pkcs1().decode('ascii')})
+        self.verifier = TokenVerifier(CertificateStore(source), BENCHMARK_PROJECT_ID)
+
+    def token(self, user):
+        from google.auth import jwt
+
+        now = int(time.time())
+
+        return jwt.encode(self.signer, {
+            'iss': f'https://securetoken.google.com/{BENCHMARK_PROJECT_ID}',
+            'aud': BENCHMARK_PROJECT_ID,
+            'sub': user.firebase_uid,
+            'user_id': user.firebase_uid,
+            'email': user.email,
+            'iat': now,
+            'exp': now + 3600
+        }).decode('ascii')
+
+    def __enter__(self):
+        from walletify import firebase_certs
+
+        self.previous_environment = os.environ.get('ENVIRONMENT')
+        os.environ['ENVIRONMENT'] = 'BENCHMARK'
+        firebase_certs.set_default_verifier(self.verifier)
+        return self
+
+    def __exit__(self, *exc_info):
+        from walletify import firebase_certs
+
+        firebase_certs.set_default_verifier(None)
+        restore_environment(self.previous_environment)
+
+
+class DevAuthentication:
+    """Serves every request as the single user of the DEV authentication bypass."""
+
+    def __enter__(self):
+        self.previous_environment = os.environ.get('ENVIRONMENT')
+        os.environ['ENVIRONMENT'] = 'DEV'
+        return self
+
+    def __exit__(self, *exc_info):
+        restore_environment(self.previous_environment)
+
+    @staticmethod
+    def users():
+        from users.models import User
+
+        return [User.from_firebase(DEV_USER_UID, DEV_USER_EMAIL)]
+
+
+def restore_environment(previous_environment):
+    if previous_environment is None:
+        os.environ.pop('ENVIRONMENT', None)
+    else:
+        os.environ['ENVIRONMENT'] = previous_environment
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if len(sorted_values) == 0:
+        return None
+
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))]
+
+
+class QueryCounter:
+    """execute_wrapper of a connection that counts the queries run through it."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+class Sample:
+    def __init__(self, status_code, seconds, queries, size):
+        self.status_code = status_code
+        self.seconds = seconds
+        self.queries = queries
+        self.size = size
+
+
+def summarize(samples, seconds):
+    ok = [sample for sample in samples if sample.status_code < 400]
+    latencies = sorted([sample.seconds * 1000 for sample in ok])
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'requests': len(samples),
+        'errors': len(samples) - len(ok),
+        'throughput': rounded(len(samples) / seconds) if seconds > 0 else None,
+        'p50_ms': rounded(percentile(latencies, 0.50)),
+        'p95_ms': rounded(percentile(latencies, 0.95)),
+        'p99_ms': rounded(percentile(latencies, 0.99)),
+        'mean_ms': rounded(statistics.mean(latencies)) if len(latencies) != 0 else None,
+        'queries_mean': rounded(statistics.mean([sample.queries for sample in ok])) if len(ok) != 0 else None,
+        'queries_max': max([sample.queries for sample in ok], default=None),
+        'bytes_mean': rounded(statistics.mean([sample.size for sample in ok])) if len(ok) != 0 else None,
+    }
+
+
+class Benchmark:
+    """
+    Sends requests to each endpoint through the full middleware stack of the
+    application, in turn, from concurrency threads that cycle through users.
+    With a token issuer every user authenticates with its own token, without
+    one the DEV authentication bypass serves a single user. A concurrency of
+    1 sends them from the calling thread.
+    """
+
+    def __init__(self, users, endpoints=None, requests=200, concurrency=4, warmup=10, token_issuer=None):
+        self.users = users
+        self.endpoints = endpoints if endpoints is not None else default_endpoints()
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.token_issuer = token_issuer
+        self.tokens = {}
+
+    def headers_of(self, user):
+        if self.token_issuer is None:
+            return {}
+
+        if user.id not in self.tokens:
+            self.tokens[user.id] = self.token_issuer.token(user)
+
+        return {'HTTP_AUTHORIZATION': 'Bearer ' + self.tokens[user.id]}
+
+    def request(self, client, endpoint, user):
+        body = endpoint.body(user)
+
+        if body is None and endpoint.method != 'get':
+            return None
+
+        counter = QueryCounter()
+        kwargs = {'content_type': 'application/json', 'data': json.dumps(body)} if body is not None else {}
+
+        with db.connection.execute_wrapper(counter):
+            started_at = time.perf_counter()
+            response = getattr(client, endpoint.method)(endpoint.path, **kwargs, **self.headers_of(user))
+            seconds = time.perf_counter() - started_at
+
+        return Sample(response.status_code, seconds, counter.queries, len(response.content))
+
+    def drive(self, endpoint, requests, samples):
+        """Sends requests requests, shared by the threads, and appends their samples."""
+        lock = threading.Lock()
+        users = cycle(self.users)
+        remaining = [requests]
+
+        def work():
+            client = Client()
+
+            while True:
+                with lock:
+                    if remaining[0] == 0:
+                        return
+
+                    remaining[0] -= 1
+                    user = next(users)
+
+                sample = self.request(client, endpoint, user)
+
+                if sample is not None:
+                    with lock:
+                        samples.append(sample)
+
+        def work_in_thread():
+            # Each thread opens its own database connection
+            try:
+                work()
+            finally:
+                db.connection.close()
+
+        if self.concurrency <= 1:
+            return work()
+
+        threads = [threading.Thread(target=work_in_thread, name=f'benchmark-{number}') for number in range(self.concurrency)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    def run_endpoint(self, endpoint):
+        # Warm-up requests are not measured, so endpoints that write are not warmed up
+        if endpoint.read_only:
+            self.drive(endpoint, self.warmup, [])
+
+        samples = []
+        started_at = time.perf_counter()
+        self.drive(endpoint, self.requests, samples)
+
+        return summarize(samples, time.perf_counter() - started_at)
+
+    def run(self):
+        return {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': db.connection.vendor,
+            'users': len(self.users),
+            'requests': self.requests,
+            'concurrency': self.concurrency,
+            'authentication': 'token' if self.token_issuer is not None else 'dev',
+            'endpoints': {endpoint.name: self.run_endpoint(endpoint) for endpoint in self.endpoints},
+        }
+
+
+def regressions(baseline, results, max_latency_increase=0.2):
+    """
+    Endpoints slower than the baseline by more than max_latency_increase at
+    p95, or running more queries per request on average, as messages.
+    """
+    messages = []
+
+    for name, current in results['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+
+        if previous is None or previous['p95_ms'] is None or current['p95_ms'] is None:
+            continue
+
+        if current['p95_ms'] > previous['p95_ms'] * (1 + max_latency_increase):
+            messages.append(f"{name}: p95 went from {previous['p95_ms']} ms to {current['p95_ms']} ms")
+
+        if None not in (current['queries_mean'], previous['queries_mean']) and current['queries_mean'] > previous['queries_mean']:
+            messages.append(f"{name}: queries per request went from {previous['queries_mean']} to {current['queries_mean']}")
+
+        if current['errors'] > previous['errors']:
+            messages.append(f"{name}: errors went from {previous['errors']} to {current['errors']}")
+
+    return messages
@@ -0,0 +1,20 @@
+import threading
+
+from django.conf import settings
+
+app_lock = threading.Lock()
+
+
+def get_app():
+    """
+    The default Firebase app, initialized on first use with credentials built
+    in memory from settings.FIREBASE_CONFIG_JSON.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
+    with app_lock:
+        try:
+            return firebase_admin.get_app()
+        except ValueError:
+            return firebase_admin.initialize_app(credentials.Certificate(settings.FIREBASE_CONFIG_JSON))
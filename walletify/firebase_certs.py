@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+from google.auth import jwt
+from firebase_admin._token_gen import ExpiredIdTokenError
+from firebase_admin._auth_utils import InvalidIdTokenError
+
+from .firebase import get_app
+
+logger = logging.getLogger(__name__)
+
+ID_TOKEN_CERT_URL = 'https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com'
+ID_TOKEN_ISSUER_PREFIX = 'https://securetoken.google.com/'
+
+
+class HttpCertificateSource:
+    """Downloads Google's public signing certificates for Firebase ID tokens."""
+
+    def __init__(self, url=ID_TOKEN_CERT_URL, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        """Returns the certificates by key id and how many seconds they can be cached."""
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+
+        max_age = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+
+        return response.json(), int(max_age.group(1)) if max_age is not None else 3600
+
+
+class StaticCertificateSource:
+    """Serves fixed certificates, e.g. the public key of a local key pair in tests and benchmarks."""
+
+    def __init__(self, certificates, max_age=3600):
+        self.certificates = certificates
+        self.max_age = max_age
+
+    def fetch(self):
+        return dict(self.certificates), self.max_age
+
+
+class CertificateStore:
+    """
+    Signing certificates kept in memory and in a file on local disk.
+
+    A background thread refreshes them refresh_margin seconds before their
+    max-age runs out, so requests only read memory. The source is fetched on
+    the request path just once: when neither memory nor disk have
+    certificates yet.
+    """
+
+    def __init__(self, source, cache_path=None, refresh_margin=300, retry_interval=60, timer=time.time):
+        self.source = source
+        self.cache_path = cache_path
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.timer = timer
+        self.lock = threading.Lock()
+        self.certificates = None
+        self.expires_at = 0
+        self.refresher = None
+
+    def load_from_disk(self):
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return False
+
+        try:
+            with open(self.cache_path) as file:
+                cached = json.load(file)
+
+            self.certificates = cached['certificates']
+            self.expires_at = cached['expires_at']
+            return True
+        except (OSError, ValueError, KeyError):
+            logger.warning("Firebase certificates cache %s could not be read", self.cache_path)
+            return False
+
+    def save_to_disk(self):
+        if self.cache_path is None:
+            return
+
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+
+        # Written to a temporary file first so concurrent workers never read half a file
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False) as file:
+            json.dump({'certificates': self.certificates, 'expires_at': self.expires_at}, file)
+
+        os.replace(file.name, self.cache_path)
+
+    def refresh(self):
+        certificates, max_age = self.source.fetch()
+
+        with self.lock:
+            self.certificates = certificates
+            self.expires_at = self.timer() + max_age
+
+            try:
+                self.save_to_disk()
+            except OSError:
+                logger.warning("Firebase certificates cache %s could not be written", self.cache_path)
+
+    def get(self):
+        if self.certificates is None:
+            with self.lock:
+                loaded = self.certificates is not None or self.load_from_disk()
+
+            if not loaded:
+                self.refresh()
+
+        return self.certificates
+
+    def seconds_until_refresh(self):
+        return max(self.expires_at - self.refresh_margin - self.timer(), 0)
+
+    def refresh_forever(self):
+        while True:
+            time.sleep(self.seconds_until_refresh())
+
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Firebase certificates could not be refreshed")
+                time.sleep(self.retry_interval)
+
+    def start(self):
+        """Starts the background refresh once per process, after reading the certificates on disk."""
+        with self.lock:
+            if self.certificates is None:
+                self.load_from_disk()
+
+            if self.refresher is None:
+                self.refresher = threading.Thread(target=self.refresh_forever, name='firebase-certificates', daemon=True)
+                self.refresher.start()
+
+
+class TokenVerifier:
+    """
+    Verifies Firebase ID tokens locally against the certificates of a store,
+    with the same checks as firebase_admin.auth.verify_id_token and without
+    any network call once the certificates are loaded.
+    """
+
+    def __init__(self, store, project_id):
+        self.store = store
+        self.project_id = project_id
+
+    def verify_id_token(self, token):
+        try:
+            header = jwt.decode_header(token)
+            payload = jwt.decode(token, verify=False)
+        except ValueError as error:
+            raise InvalidIdTokenError(str(error), cause=error)
+
+        subject = payload.get('sub')
+
+        if header.get('alg') != 'RS256':
+            raise InvalidIdTokenError(f"Firebase ID token has incorrect algorithm. Expected \"RS256\" but got \"{header.get('alg')}\".")
+        elif not header.get('kid'):
+            raise InvalidIdTokenError("Firebase ID token has no \"kid\" claim.")
+        elif payload.get('aud') != self.project_id:
+            raise InvalidIdTokenError(f"Firebase ID token has incorrect \"aud\" (audience) claim. Expected \"{self.project_id}\" but got \"{payload.get('aud')}\".")
+        elif payload.get('iss') != ID_TOKEN_ISSUER_PREFIX + self.project_id:
+            raise InvalidIdTokenError(f"Firebase ID token has incorrect \"iss\" (issuer) claim. Expected \"{ID_TOKEN_ISSUER_PREFIX + self.project_id}\" but got \"{payload.get('iss')}\".")
+        elif not isinstance(subject, str) or not 0 < len(subject) <= 128:
+            raise InvalidIdTokenError("Firebase ID token has an invalid \"sub\" (subject) claim.")
+
+        try:
+            verified_claims = jwt.decode(token, certs=self.store.get(), audience=self.project_id)
+        except ValueError as error:
+            if 'Token expired' in str(error):
+                raise ExpiredIdTokenError(str(error), cause=error)
+            raise InvalidIdTokenError(str(error), cause=error)
+
+        verified_claims['uid'] = verified_claims['sub']
+        return verified_claims
+
+
+default_verifier_lock = threading.Lock()
+default_verifier = None
+
+
+def get_default_verifier():
+    """Verifier built from the settings on first use, refreshing Google's certificates in the background."""
+    global default_verifier
+
+    with default_verifier_lock:
+        if default_verifier is None:
+            store = CertificateStore(
+                HttpCertificateSource(),
+                cache_path=settings.FIREBASE_CERTS_CACHE_PATH,
+                refresh_margin=settings.FIREBASE_CERTS_REFRESH_MARGIN
+            )
+            store.start()
+            default_verifier = TokenVerifier(store, get_app().project_id)
+
+        return default_verifier
+
+
+def set_default_verifier(verifier):
+    """Replaces the verifier, e.g. with one whose store serves a local stand-in key pair."""
+    global default_verifier
+
+    with default_verifier_lock:
+        default_verifier = verifier
+
+
+def verify_id_token(token):
+    return get_default_verifier().verify_id_token(token)
@@ -0,0 +1,101 @@
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf'))
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, float('inf'))
+
+REQUESTS = Counter('walletify_http_requests_total', 'Requests by route, method and status code.', ['route', 'method', 'status'])
+REQUEST_LATENCY = Histogram('walletify_http_request_duration_seconds', 'Wall time of the requests, through the whole middleware chain.', ['route', 'method'])
+REQUEST_QUERIES = Histogram('walletify_http_request_db_queries', 'SQL queries run by each request.', ['route', 'method'], buckets=QUERY_BUCKETS)
+REQUEST_DB_TIME = Histogram('walletify_http_request_db_duration_seconds', 'Time each request spent running SQL queries.', ['route', 'method'])
+TOKEN_CACHE_LOOKUPS = Counter('walletify_token_cache_lookups_total', 'Lookups of ID tokens in the verified token cache by result, hit or miss.', ['result'])
+JOB_RUNS = Counter('walletify_job_runs_total', 'Runs of the scheduled jobs by outcome, success or failure.', ['job', 'outcome'])
+JOB_DURATION = Histogram('walletify_job_duration_seconds', 'Wall time of the runs of the scheduled jobs.', ['job'], buckets=JOB_BUCKETS)
+JOB_ROWS_SCANNED = Counter('walletify_job_rows_scanned_total', 'Rows scanned by the scheduled jobs.', ['job'])
+JOB_EMAILS_SENT = Counter('walletify_job_emails_sent_total', 'Emails sent by the scheduled jobs.', ['job'])
+
+
+def registry():
+    """
+    Under gunicorn.conf.py every worker writes its metrics to files of
+    PROMETHEUS_MULTIPROC_DIR, and they are added up when they are collected.
+    A single process is collected from memory.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def route_of(request):
+    # Routes, unlike paths, have a bounded number of values
+    match = request.resolver_match
+    return match.route if match is not None else 'unmatched'
+
+
+def observe_job(job_id, seconds, result=None):
+    """Records a run of a scheduled job, failed when it has no result, with the rows_scanned and emails_sent it returned."""
+    JOB_RUNS.labels(job_id, 'failure' if result is None else 'success').inc()
+    JOB_DURATION.labels(job_id).observe(seconds)
+
+    if result is not None:
+        JOB_ROWS_SCANNED.labels(job_id).inc(result.get('rows_scanned', 0))
+        JOB_EMAILS_SENT.labels(job_id).inc(result.get('emails_sent', 0))
+
+
+class QueryRecorder:
+    """execute_wrapper of a connection that counts and times the queries run through it."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        started_at = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started_at
+
+
+class RequestMetrics:
+    """Outermost middleware. Records the count, latency and SQL queries of every request by route and method."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started_at = time.perf_counter()
+
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        route, method = route_of(request), request.method
+        REQUESTS.labels(route, method, response.status_code).inc()
+        REQUEST_LATENCY.labels(route, method).observe(time.perf_counter() - started_at)
+        REQUEST_QUERIES.labels(route, method).observe(recorder.queries)
+        REQUEST_DB_TIME.labels(route, method).observe(recorder.seconds)
+
+        return response
+
+
+def metrics(request):
+    """Metrics in the Prometheus text format. With METRICS_TOKEN set, scrapes must send it as a Bearer token."""
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'.encode()
+
+        if not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', '').encode(), expected):
+            return HttpResponse(status=401)
+
+    return HttpResponse(generate_latest(registry()), content_type=CONTENT_TYPE_LATEST)
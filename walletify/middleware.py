@@ -1,11 +1,48 @@
 import json
 import os
 
-from django.http import JsonResponse
-from firebase_admin import auth
+from django.conf import settings
+from django.db import transaction
 from firebase_admin._token_gen import ExpiredIdTokenError
 from firebase_admin._auth_utils import InvalidIdTokenError
 from users.models import User
+from users.cache import UserCache
+from walletify import firebase_certs, metrics
+from walletify.timing import JsonResponse, measure
+from walletify.token_cache import VerifiedTokenCache
+
+VERIFIED_TOKENS = VerifiedTokenCache(maxsize=settings.FIREBASE_TOKEN_CACHE_SIZE)
+CACHED_USERS = UserCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+# Served without a Firebase user. /metrics checks METRICS_TOKEN itself
+PUBLIC_PATHS = ('/docs', '/redocs', '/metrics')
+
+
+def is_public(request):
+    return request.path.startswith(PUBLIC_PATHS)
+
+
+def verify_token(token):
+    decoded_token = VERIFIED_TOKENS.get(token)
+    metrics.TOKEN_CACHE_LOOKUPS.labels('miss' if decoded_token is None else 'hit').inc()
+
+    if decoded_token is None:
+        decoded_token = firebase_certs.verify_id_token(token)
+        VERIFIED_TOKENS.put(token, decoded_token)
+
+    return decoded_token
+
+
+def resolve_user(firebase_uid, email):
+    user = CACHED_USERS.get(firebase_uid)
+
+    if user is None or user.email != email:
+        user = User.from_firebase(firebase_uid, email)
+        # Only users that are surely in the database are cached
+        transaction.on_commit(lambda: CACHED_USERS.put(user))
+
+    return user
 
 
 class CustomFirebaseAuthentication:
@@ -17,7 +54,7 @@ class CustomFirebaseAuthentication:
         return response
 
     def process_view(self, request, view_func, view_args, view_kwargs):
-        if not (request.path.startswith('/docs') or request.path.startswith('/redocs')):
+        if not is_public(request):
             if os.environ.get('ENVIRONMENT') == "DEV":
                 request.META['uid'] = 'randomrandomrandomrandomrand'
                 request.META['email'] = 'random@random.com'
@@ -25,7 +62,10 @@ class CustomFirebaseAuthentication:
                 try:
                     authorization_header = request.META.get('HTTP_AUTHORIZATION')
                     token = authorization_header.replace("Bearer ", "")
-                    decoded_token = auth.verify_id_token(token)
+
+                    with measure(request, 'auth'):
+                        decoded_token = verify_token(token)
+
                     request.META['uid'] = decoded_token['user_id']
                     request.META['email'] = decoded_token['email']
                 except KeyError:
@@ -49,11 +89,9 @@ class CustomUserCreation:
         return response
 
     def process_view(self, request, view_func, view_args, view_kwargs):
-        if not (request.path.startswith('/docs') or request.path.startswith('/redocs')):
-            if not User.objects.filter(firebase_uid=request.META['uid'], email=request.META['email']).exists():
-                User.objects.create(firebase_uid=request.META['uid'], email=request.META['email'])
-
-            request.META['user'] = User.objects.get(firebase_uid=request.META['uid'], email=request.META['email'])
+        if not is_public(request):
+            with measure(request, 'user'):
+                request.META['user'] = resolve_user(request.META['uid'], request.META['email'])
 
         return None
 
@@ -67,9 +105,13 @@ class SanitizeRequest:
         return response
 
     def process_view(self, request, view_func, view_args, view_kwargs):
-        if request.body == b'':
-            request.META['body'] = {}
-        else:
-            request.META['body'] = json.loads(request.body.decode('utf-8'))
+        with measure(request, 'body'):
+            # Uploads are read by the views themselves
+            if request.content_type in ['text/csv', 'multipart/form-data']:
+                request.META['body'] = {}
+            elif request.body == b'':
+                request.META['body'] = {}
+            else:
+                request.META['body'] = json.loads(request.body.decode('utf-8'))
 
         return None
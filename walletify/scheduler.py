@@ -1,8 +1,193 @@
+import atexit
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django import db
+from django.conf import settings
+
+from jobs.jobstore import DjangoJobStore
+from jobs.models import JobRun
+from notifications.dispatcher import dispatch_notifications
+from . import metrics
 from .tasks import notify_expiration_expenses
 
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = 'walletify-scheduler'
+NOTIFY_EXPIRATION_EXPENSES = 'notify_expiration_expenses'
+DISPATCH_NOTIFICATIONS = 'dispatch_notifications'
+
+
+def run_job(job_id, function):
+    """Runs the job through JobRun.record and reports its duration and the rows and emails it handled to the metrics."""
+    started_at = time.monotonic()
+    result = None
+
+    try:
+        result = JobRun.record(job_id, function)
+        return result
+    finally:
+        metrics.observe_job(job_id, time.monotonic() - started_at, result)
+        db.close_old_connections()
+
+
+def run_notify_expiration_expenses():
+    return run_job(NOTIFY_EXPIRATION_EXPENSES, notify_expiration_expenses)
+
+
+def run_dispatch_notifications():
+    return run_job(DISPATCH_NOTIFICATIONS, dispatch_notifications)
+
+
+def schedule_job(scheduler, func, trigger, job_id):
+    """
+    Adds the job unless the job store already has it with the same trigger.
+    A stored job keeps its next run time, so a run missed while no process
+    was leading is caught up according to the misfire settings.
+    """
+    stored_job = scheduler.get_job(job_id)
+    options = {
+        'misfire_grace_time': settings.SCHEDULER_MISFIRE_GRACE_TIME,
+        'coalesce': settings.SCHEDULER_COALESCE,
+    }
+
+    if stored_job is None or str(stored_job.trigger) != str(trigger):
+        scheduler.add_job(func, trigger, id=job_id, replace_existing=True, **options)
+    else:
+        scheduler.modify_job(job_id, func=func, **options)
+
+
+def add_jobs(scheduler):
+    schedule_job(scheduler, run_notify_expiration_expenses, CronTrigger(hour='14', minute='00'), NOTIFY_EXPIRATION_EXPENSES)
+    schedule_job(scheduler, run_dispatch_notifications, IntervalTrigger(seconds=settings.NOTIFICATION_DISPATCH_INTERVAL), DISPATCH_NOTIFICATIONS)
+
+
+class LeaderScheduler:
+    """
+    Runs scheduled jobs in exactly one process of the deployment. Every
+    process sends a heartbeat that takes or renews a SchedulerLease, and the
+    jobs scheduler only runs while the process holds it. If the leader dies
+    its lease expires after lease_duration seconds and the next heartbeat of
+    a standby takes over. Hosts are expected to keep their clocks within a
+    fraction of lease_duration of each other.
+    """
+
+    def __init__(self, add_jobs, lease_name=LEASE_NAME, lease_duration=30, heartbeat_interval=10, holder=None, jobstore_factory=DjangoJobStore):
+        self.add_jobs = add_jobs
+        self.jobstore_factory = jobstore_factory
+        self.lease_name = lease_name
+        self.lease_duration = lease_duration
+        self.heartbeat_interval = heartbeat_interval
+        self.holder = holder if holder is not None else f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.lock = threading.Lock()
+        self.heartbeat_scheduler = None
+        self.jobs_scheduler = None
+
+    @property
+    def is_leader(self):
+        return self.jobs_scheduler is not None
+
+    def heartbeat(self):
+        from jobs.models import SchedulerLease
+
+        db.close_old_connections()
+
+        try:
+            leading = SchedulerLease.acquire(self.lease_name, self.holder, self.lease_duration)
+        except db.DatabaseError:
+            # Without a renewed lease another process may take over, so jobs stop here
+            logger.exception("Scheduler lease %s could not be renewed by %s", self.lease_name, self.holder)
+            leading = False
+        finally:
+            db.close_old_connections()
+
+        with self.lock:
+            if leading and not self.is_leader:
+                logger.info("%s is now running the scheduled jobs", self.holder)
+                self.jobs_scheduler = BackgroundScheduler(jobstores={'default': self.jobstore_factory()})
+                # Paused until the jobs are added, so stored jobs are not run with stale options
+                self.jobs_scheduler.start(paused=True)
+                self.add_jobs(self.jobs_scheduler)
+                self.jobs_scheduler.resume()
+            elif not leading and self.is_leader:
+                logger.info("%s lost the scheduler lease and stopped the scheduled jobs", self.holder)
+                self.stop_jobs()
+
+        return leading
+
+    def stop_jobs(self):
+        if self.jobs_scheduler is not None:
+            self.jobs_scheduler.shutdown(wait=False)
+            self.jobs_scheduler = None
+
+    def start(self):
+        self.heartbeat_scheduler = BackgroundScheduler()
+        self.heartbeat_scheduler.add_job(
+            self.heartbeat,
+            trigger='interval',
+            seconds=self.heartbeat_interval,
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        self.heartbeat_scheduler.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stops both schedulers and releases the lease, so a standby does not wait for it to expire."""
+        from jobs.models import SchedulerLease
+
+        if self.heartbeat_scheduler is not None and self.heartbeat_scheduler.running:
+            self.heartbeat_scheduler.shutdown(wait=False)
+
+        with self.lock:
+            was_leader = self.is_leader
+            self.stop_jobs()
+
+        if was_leader:
+            try:
+                SchedulerLease.release(self.lease_name, self.holder)
+            except db.DatabaseError:
+                logger.exception("Scheduler lease %s could not be released by %s", self.lease_name, self.holder)
+
+
+def should_start(argv=None):
+    """
+    Whether the app registry starts the scheduler, only in the process of
+    manage.py runserver that serves requests, not in its autoreloader. Under
+    gunicorn.conf.py the workers start it after the fork instead. Every other
+    entrypoint (migrate, test, shell, pytest, scripts...) never takes part in
+    the election.
+    """
+    argv = argv if argv is not None else sys.argv
+
+    if not settings.SCHEDULER_ENABLED or os.path.basename(argv[0]) != 'manage.py' or argv[1:2] != ['runserver']:
+        return False
+
+    return '--noreload' in argv or os.environ.get('RUN_MAIN') == 'true'
+
+
+leader_scheduler = None
+
 
 def start():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(notify_expiration_expenses, trigger='cron', hour='14', minute='00')
-    scheduler.start()
+    global leader_scheduler
+
+    if leader_scheduler is None:
+        leader_scheduler = LeaderScheduler(
+            add_jobs,
+            lease_duration=settings.SCHEDULER_LEASE_DURATION,
+            heartbeat_interval=settings.SCHEDULER_HEARTBEAT_INTERVAL
+        )
+        leader_scheduler.start()
+
+    return leader_scheduler
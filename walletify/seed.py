@@ -0,0 +1,222 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+
+SEED_UID_PREFIX = 'seed'
+SEED_UID_REGEX = rf'^{SEED_UID_PREFIX}[0-9]{{24}}$'
+EXPENSE_NAMES = ['Supermercado', 'Alquiler', 'Colectivo', 'Cafe', 'Farmacia', 'Luz', 'Gas', 'Internet', 'Cine', 'Restaurante']
+ICON_NAMES = ['Paid', 'ShoppingCart', 'Home', 'DirectionsBus', 'LocalCafe', 'Pets', 'School', 'SportsSoccer']
+
+
+def parse_range(value):
+    """Reads 'N' as exactly N and 'MIN:MAX' as a uniform pick between both, inclusive."""
+    low, _, high = value.partition(':')
+    low, high = int(low), int(high or low)
+
+    if low < 0 or high < low:
+        raise ValueError(f"{value} is not a valid N or MIN:MAX range")
+
+    return low, high
+
+
+def seed_uid(index):
+    # Firebase UIDs are 28 characters long
+    return f'{SEED_UID_PREFIX}{index:024d}'
+
+
+def bulk_create_in_batches(model, objects, batch_size):
+    """Inserts objects from any iterable batch_size rows at a time and returns how many were inserted."""
+    objects = iter(objects)
+    created = 0
+
+    while True:
+        batch = list(islice(objects, batch_size))
+
+        if len(batch) == 0:
+            return created
+
+        model.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+
+
+class Seeder:
+    """
+    Generates users with their categories, budgets, limit details, future
+    expenses and expenses. Every count per user is drawn from a (MIN, MAX)
+    range by a random generator of that user seeded with seed and its number,
+    so the same arguments always generate the same data, whatever the chunk
+    and batch sizes. Rows are written through chunked bulk_create, a chunk of
+    users per transaction along with their daily spending.
+    """
+
+    def __init__(self, seed=0, categories=(0, 3), budgets=(1, 3), limit_details=(0, 5), future_expenses=(0, 5), expenses=(0, 100), days=365, budget_days=30, today=None, batch_size=5000, users_per_chunk=500, log=None):
+        self.seed_value = seed
+        self.categories = categories
+        self.budgets = budgets
+        self.limit_details = limit_details
+        self.future_expenses = future_expenses
+        self.expenses = expenses
+        self.days = days
+        self.budget_days = budget_days
+        self.today = today if today is not None else date.today()
+        self.batch_size = batch_size
+        self.users_per_chunk = users_per_chunk
+        self.log = log if log is not None else (lambda message: None)
+        self.counts = {'users': 0, 'categories': 0, 'budgets': 0, 'limit_details': 0, 'future_expenses': 0, 'expenses': 0}
+
+    @staticmethod
+    def value(generator, low=1, high=500):
+        return Decimal(generator.randint(low * 100, high * 100)) / 100
+
+    @staticmethod
+    def random_date(generator, first_date, last_date):
+        return first_date + timedelta(days=generator.randint(0, (last_date - first_date).days))
+
+    def create_users(self, indexes):
+        """Inserts the users and returns them with the random generator of each one."""
+        from users.models import User
+
+        users = [User(firebase_uid=seed_uid(index), email=f'{seed_uid(index)}@walletify.test') for index in indexes]
+        users = User.objects.bulk_create(users, batch_size=self.batch_size)
+
+        return [(user, random.Random(f'{self.seed_value}:{index}')) for user, index in zip(users, indexes)]
+
+    def create_categories(self, users):
+        from categories.models import Category
+
+        categories = []
+
+        for user, generator in users:
+            for number in range(generator.randint(*self.categories)):
+                categories.append(Category(
+                    user=user,
+                    name=f'categoria {number + 1}',
+                    material_ui_icon_name=generator.choice(ICON_NAMES),
+                    color=f'rgba({generator.randint(0, 255)},{generator.randint(0, 255)},{generator.randint(0, 255)},1)'
+                ))
+
+        return Category.objects.bulk_create(categories, batch_size=self.batch_size)
+
+    def create_budgets(self, users):
+        """Consecutive budgets of budget_days days that never overlap, the last one being the current one."""
+        from budgets.models import Budget
+
+        budgets = []
+
+        for user, generator in users:
+            final_date = self.today + timedelta(days=generator.randint(0, self.budget_days - 1))
+
+            for _ in range(generator.randint(*self.budgets)):
+                initial_date = final_date - timedelta(days=self.budget_days - 1)
+                budgets.append(Budget(user=user, initial_date=initial_date, final_date=final_date))
+                final_date = initial_date - timedelta(days=1)
+
+        return Budget.objects.bulk_create(budgets, batch_size=self.batch_size)
+
+    def generate_details(self, budgets, generators, category_ids_by_user):
+        from budgets.models import LimitDetail, FutureExpenseDetail
+
+        limit_details, future_expenses = [], []
+
+        for budget in budgets:
+            generator = generators[budget.user_id]
+            category_ids = category_ids_by_user[budget.user_id]
+
+            # A category has at most one limit per budget
+            for category_id in generator.sample(category_ids, min(generator.randint(*self.limit_details), len(category_ids))):
+                limit_details.append(LimitDetail(assigned_budget=budget, category_id=category_id, value=self.value(generator, 100, 5000)))
+
+            for _ in range(generator.randint(*self.future_expenses)):
+                future_expenses.append(FutureExpenseDetail(
+                    assigned_budget=budget,
+                    category_id=generator.choice(category_ids),
+                    value=self.value(generator),
+                    name=generator.choice(EXPENSE_NAMES),
+                    expiration_date=self.random_date(generator, budget.initial_date, budget.final_date),
+                    expended=generator.random() < 0.3
+                ))
+
+        return limit_details, future_expenses
+
+    def generate_expenses(self, users, category_ids_by_user, daily_totals):
+        """Yields the expenses of the users and adds each of them to daily_totals, keyed like DailySpending."""
+        from expenses.models import Expense
+
+        first_date = self.today - timedelta(days=self.days - 1)
+
+        for user, generator in users:
+            category_ids = category_ids_by_user[user.id]
+
+            for _ in range(generator.randint(*self.expenses)):
+                expense = Expense(
+                    user=user,
+                    category_id=generator.choice(category_ids),
+                    date=self.random_date(generator, first_date, self.today),
+                    value=self.value(generator),
+                    name=generator.choice(EXPENSE_NAMES)
+                )
+
+                key = (user.id, expense.category_id, expense.date)
+                total, count = daily_totals.get(key, (0, 0))
+                daily_totals[key] = (total + expense.value, count + 1)
+
+                yield expense
+
+    def seed_users(self, indexes, static_category_ids):
+        from budgets.models import LimitDetail, FutureExpenseDetail
+        from expenses.models import Expense, DailySpending
+
+        with transaction.atomic():
+            users = self.create_users(indexes)
+            generators = {user.id: generator for user, generator in users}
+            category_ids_by_user = {user.id: list(static_category_ids) for user, _ in users}
+
+            for category in self.create_categories(users):
+                category_ids_by_user[category.user_id].append(category.id)
+
+            budgets = self.create_budgets(users)
+            limit_details, future_expenses = self.generate_details(budgets, generators, category_ids_by_user)
+
+            self.counts['users'] += len(users)
+            self.counts['categories'] += sum([len(category_ids) - len(static_category_ids) for category_ids in category_ids_by_user.values()])
+            self.counts['budgets'] += len(budgets)
+            self.counts['limit_details'] += bulk_create_in_batches(LimitDetail, limit_details, self.batch_size)
+            self.counts['future_expenses'] += bulk_create_in_batches(FutureExpenseDetail, future_expenses, self.batch_size)
+
+            # The users are new, so their daily spending is inserted without reading the table
+            daily_totals = {}
+            self.counts['expenses'] += bulk_create_in_batches(Expense, self.generate_expenses(users, category_ids_by_user, daily_totals), self.batch_size)
+            bulk_create_in_batches(DailySpending, (
+                DailySpending(user_id=user_id, category_id=category_id, date=day, total=total, count=count)
+                for (user_id, category_id, day), (total, count) in daily_totals.items()
+            ), self.batch_size)
+
+    def seed(self, users, first_index=0):
+        """Generates users seed users numbered from first_index and returns the rows created by model."""
+        from categories.models import Category
+
+        started_at = time.monotonic()
+        static_category_ids = list(Category.static_categories().order_by('id').values_list('id', flat=True))
+
+        if len(static_category_ids) == 0:
+            raise ValueError("Static categories are missing, run the migrations first")
+
+        indexes = range(first_index, first_index + users)
+
+        for chunk_start in range(0, users, self.users_per_chunk):
+            self.seed_users(indexes[chunk_start:chunk_start + self.users_per_chunk], static_category_ids)
+            self.log(f"{self.counts['users']}/{users} users seeded in {time.monotonic() - started_at:.1f} s: {self.counts}")
+
+        return dict(self.counts)
+
+
+def delete_seeded_users():
+    """Deletes the users generated by Seeder, and everything of them through the cascades."""
+    from users.models import User
+
+    deleted, _ = User.objects.filter(firebase_uid__regex=SEED_UID_REGEX).delete()
+    return deleted
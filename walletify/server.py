@@ -0,0 +1,74 @@
+import logging
+import os
+import time
+
+from django import db
+from django.conf import settings
+from django.urls import get_resolver, resolve, Resolver404
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_PATHS = ['/expense', '/category', '/budget', '/budget/current', '/docs/']
+
+
+def prime_url_resolution():
+    resolver = get_resolver()
+    # Builds the reverse lookup tables, otherwise built by the first reverse() of the worker
+    resolver.reverse_dict
+
+    for path in WARM_UP_PATHS:
+        try:
+            resolve(path)
+        except Resolver404:
+            logger.warning("Warm-up path %s does not resolve", path)
+
+
+def prime_static_categories():
+    from categories.models import Category
+
+    Category.cached_catalog(None)
+
+
+def prime_token_verification():
+    from walletify import firebase, firebase_certs
+
+    firebase.get_app()
+
+    if os.environ.get('ENVIRONMENT') != "DEV":
+        try:
+            firebase_certs.get_default_verifier().store.get()
+        except Exception:
+            # The first request fetches them again
+            logger.exception("Firebase certificates could not be loaded during warm-up")
+
+
+def before_fork():
+    """Closes the connections opened while preloading, so workers never share a socket with the server process."""
+    db.connections.close_all()
+
+
+def after_fork():
+    """
+    Runs in every worker right after the fork. Threads of the preloading
+    process do not survive it, so the scheduler is started here.
+    """
+    from walletify import scheduler
+
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+
+
+def warm_up():
+    """
+    Opens the database connection of the worker and primes URL resolution,
+    the static categories and the token verification path, so the first
+    requests it serves do not pay for them.
+    """
+    started_at = time.monotonic()
+
+    db.connection.ensure_connection()
+    prime_url_resolution()
+    prime_static_categories()
+    prime_token_verification()
+
+    logger.info("Worker %s warmed up in %.3f s", os.getpid(), time.monotonic() - started_at)
@@ -11,10 +11,8 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
-import firebase_admin
-import json
-from walletify import scheduler
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -50,10 +48,14 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'expenses.apps.ExpensesConfig',
     'categories.apps.CategoriesConfig',
-    'budgets.apps.BudgetsConfig'
+    'budgets.apps.BudgetsConfig',
+    'jobs.apps.JobsConfig',
+    'notifications.apps.NotificationsConfig'
 ]
 
 MIDDLEWARE = [
+    'walletify.metrics.RequestMetrics',
+    'walletify.timing.RequestTiming',
     'walletify.middleware.CustomFirebaseAuthentication',
     'walletify.middleware.CustomUserCreation',
     'walletify.middleware.SanitizeRequest',
@@ -65,6 +67,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'walletify.timing.ViewTiming',
 ]
 
 ROOT_URLCONF = 'walletify.urls'
@@ -107,10 +110,25 @@ elif os.environ.get('DATABASE') == "POSTGRES":
             'PORT': os.environ.get('DB_PORT'),
             'USER': os.environ.get('DB_USER'),
             'PASSWORD': os.environ.get('DB_PASSWORD'),
+            # Workers of the production server keep their connection between requests
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
             # 'OPTIONS': {'ssl': {'ca': os.environ.get('MYSQL_ATTR_SSL_CA')}}
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# Category catalogs are kept in the cache of each process, under keys that
+# include the data version of their user, so workers never invalidate each other.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+CATEGORY_CATALOG_TTL = int(os.environ.get('CATEGORY_CATALOG_TTL', 300))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -151,12 +169,19 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# Create .json file
+# Expenses pagination
+EXPENSE_PAGE_SIZE = int(os.environ.get('EXPENSE_PAGE_SIZE', 100))
+EXPENSE_MAX_PAGE_SIZE = int(os.environ.get('EXPENSE_MAX_PAGE_SIZE', 1000))
+EXPENSE_EXPORT_CHUNK_SIZE = int(os.environ.get('EXPENSE_EXPORT_CHUNK_SIZE', 2000))
+EXPENSE_IMPORT_MAX_ROWS = int(os.environ.get('EXPENSE_IMPORT_MAX_ROWS', 10000))
+EXPENSE_IMPORT_BATCH_SIZE = int(os.environ.get('EXPENSE_IMPORT_BATCH_SIZE', 500))
+
+# Firebase service account, read by walletify.firebase when the app is first needed
 FIREBASE_CONFIG_JSON = {
     "type": os.environ.get('FIREBASE_TYPE'),
     "project_id": os.environ.get('FIREBASE_TYPE_PROJECT_ID'),
     "private_key_id": os.environ.get('FIREBASE_PRIVATE_KEY_ID'),
-    "private_key": os.environ.get('FIREBASE_PRIVATE_KEY_KEY').replace('\\n', '\n'),
+    "private_key": os.environ.get('FIREBASE_PRIVATE_KEY_KEY', '').replace('\\n', '\n'),
     "client_email": os.environ.get('FIREBASE_CLIENT_EMAIL'),
     "client_id": os.environ.get('FIREBASE_CLIENT_ID'),
     "auth_uri": os.environ.get('FIREBASE_AUTH_URI'),
@@ -165,16 +190,72 @@ FIREBASE_CONFIG_JSON = {
     "client_x509_cert_url": os.environ.get('FIREBASE_CLIENT_X509_CERT_URL')
 }
 
-with open('firebase-config.json', 'w') as file:
-    json.dump(FIREBASE_CONFIG_JSON, file)
+# Verified ID tokens kept in memory by walletify.middleware until they expire
+FIREBASE_TOKEN_CACHE_SIZE = int(os.environ.get('FIREBASE_TOKEN_CACHE_SIZE', 10000))
+
+# Users resolved by walletify.middleware are kept in memory by Firebase UID
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
+# Google's signing certificates are cached on disk and refreshed this many seconds before they expire
+FIREBASE_CERTS_CACHE_PATH = os.environ.get('FIREBASE_CERTS_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'walletify-firebase-certs.json'))
+FIREBASE_CERTS_REFRESH_MARGIN = int(os.environ.get('FIREBASE_CERTS_REFRESH_MARGIN', 300))
 
-FIREBASE_CONFIG = os.path.join(BASE_DIR, 'firebase-config.json')
-FIREBASE_CREDS = firebase_admin.credentials.Certificate(FIREBASE_CONFIG)
-FIREBASE_APP = firebase_admin.initialize_app(FIREBASE_CREDS)
+# Share of the requests, from 0 to 1, whose timings walletify.timing reports in a
+# Server-Timing header and a JSON log line of the walletify.timing logger
+REQUEST_TIMING_SAMPLE_RATE = float(os.environ.get('REQUEST_TIMING_SAMPLE_RATE', 0.01))
+
+# Bearer token that scrapes of /metrics must send. Unset, the metrics are public
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'walletify.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
 
 EMAIL_HOST = os.environ.get('MAILTRAP_EMAIL_HOST')
 EMAIL_HOST_USER = os.environ.get('MAILTRAP_EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('MAILTRAP_EMAIL_HOST_PASSWORD')
 EMAIL_PORT = os.environ.get('MAILTRAP_EMAIL_PORT')
 
-scheduler.start()
+# The daily notification job splits users into id-range shards, processed by a
+# 'thread' or 'process' pool of NOTIFICATION_WORKERS (1 runs them inline), and
+# queues reminders in the notifications outbox.
+NOTIFICATION_SHARDS = int(os.environ.get('NOTIFICATION_SHARDS', 8))
+NOTIFICATION_WORKERS = int(os.environ.get('NOTIFICATION_WORKERS', 4))
+NOTIFICATION_POOL = os.environ.get('NOTIFICATION_POOL', 'thread')
+
+# Every NOTIFICATION_DISPATCH_INTERVAL seconds NOTIFICATION_WORKERS threads send the
+# queued reminders in batches, at most NOTIFICATION_RATE_LIMIT emails per second
+# (0 is unlimited). Failed emails are retried NOTIFICATION_RETRY_BACKOFF seconds
+# later, doubled on every attempt, up to NOTIFICATION_MAX_ATTEMPTS times.
+NOTIFICATION_DISPATCH_INTERVAL = int(os.environ.get('NOTIFICATION_DISPATCH_INTERVAL', 60))
+NOTIFICATION_DISPATCH_BATCH_SIZE = int(os.environ.get('NOTIFICATION_DISPATCH_BATCH_SIZE', 100))
+NOTIFICATION_RATE_LIMIT = float(os.environ.get('NOTIFICATION_RATE_LIMIT', 10))
+NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5))
+NOTIFICATION_RETRY_BACKOFF = int(os.environ.get('NOTIFICATION_RETRY_BACKOFF', 60))
+NOTIFICATION_CLAIM_TIMEOUT = int(os.environ.get('NOTIFICATION_CLAIM_TIMEOUT', 300))
+
+# Every process sends a heartbeat to take or renew the scheduler lease, and only
+# its holder runs scheduled jobs. A standby takes over once the lease expires.
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', 'True') == 'True'
+SCHEDULER_LEASE_DURATION = int(os.environ.get('SCHEDULER_LEASE_DURATION', 30))
+SCHEDULER_HEARTBEAT_INTERVAL = int(os.environ.get('SCHEDULER_HEARTBEAT_INTERVAL', 10))
+
+# Jobs are stored in the database. A run missed while no process was leading is
+# caught up if it is at most SCHEDULER_MISFIRE_GRACE_TIME seconds late, and
+# several missed runs are coalesced into one when SCHEDULER_COALESCE is set.
+SCHEDULER_MISFIRE_GRACE_TIME = int(os.environ.get('SCHEDULER_MISFIRE_GRACE_TIME', 6 * 60 * 60))
+SCHEDULER_COALESCE = os.environ.get('SCHEDULER_COALESCE', 'True') == 'True'
@@ -1,34 +1,159 @@
-from django.core.mail import send_mail
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
+import django
+from django import db
+from django.conf import settings
+from django.db.models import Min, Max
+from datetime import date
+from itertools import islice
 
+logger = logging.getLogger(__name__)
 
-def notify_expiration_expenses():
-    from budgets.models import FutureExpenseDetail
-    from budgets.models import Budget
+QUEUE_BATCH_SIZE = 1000
+
+
+class ShardProgress:
+    """Future expenses read and users with reminders queued by one shard, logged as it goes."""
+
+    def __init__(self, shard, user_id_range):
+        self.shard = shard
+        self.first_user_id, self.last_user_id = user_id_range
+        self.rows_scanned = 0
+        self.users = 0
+        self.seconds = 0
+
+    @property
+    def as_dict(self):
+        return {
+            'shard': self.shard,
+            'first_user_id': self.first_user_id,
+            'last_user_id': self.last_user_id,
+            'rows_scanned': self.rows_scanned,
+            'users': self.users,
+            'seconds': round(self.seconds, 3)
+        }
+
+
+def user_id_shards(shards):
+    """
+    Splits the ids of the users into at most shards contiguous [first, last)
+    ranges. A single shard is unbounded and needs no query.
+    """
     from users.models import User
-    print("Info: Users are notified...")
 
-    for user in User.objects.all():
+    if shards <= 1:
+        return [(None, None)]
+
+    bounds = User.objects.aggregate(first=Min('id'), last=Max('id'))
+
+    if bounds['first'] is None:
+        return []
+
+    size = math.ceil((bounds['last'] - bounds['first'] + 1) / shards)
+
+    return [(first, min(first + size, bounds['last'] + 1)) for first in range(bounds['first'], bounds['last'] + 1, size)]
+
+
+def future_expenses_to_notify(today, user_id_range=(None, None)):
+    """
+    Unexpended future expenses of current budgets that are due in three days,
+    with their budget, user and category joined in the same query.
+    """
+    from budgets.models import FutureExpenseDetail
+
+    details = FutureExpenseDetail.to_notify_on(today).filter(
+        assigned_budget__user__isnull=False,
+        assigned_budget__initial_date__lte=today,
+        assigned_budget__final_date__gte=today
+    )
+
+    first_user_id, last_user_id = user_id_range
+
+    if first_user_id is not None:
+        details = details.filter(assigned_budget__user_id__gte=first_user_id, assigned_budget__user_id__lt=last_user_id)
 
-        current_budget = Budget.current_budget_of(user)
+    return details.select_related('assigned_budget__user', 'category').order_by('assigned_budget__user_id', 'id')
 
-        if current_budget is not None:
-            future_expenses = FutureExpenseDetail.objects.filter(assigned_budget=current_budget)
-            future_expenses = [detail for detail in future_expenses if detail.should_be_notified()]
 
-            if len(future_expenses) > 0:
+def queue_shard(shard, user_id_range, today):
+    """Queues in the notification outbox the reminders of the users of one id range."""
+    from notifications.models import Notification
 
-                string_email = "¡ACUERDATE DE PAGAR!" + '\n\n' + "Recuerda que se vence los siguientes pagos: "
+    progress = ShardProgress(shard, user_id_range)
+    started_at = time.monotonic()
 
-                for future_expense_detail in FutureExpenseDetail.objects.all():
+    details = future_expenses_to_notify(today, user_id_range).iterator(chunk_size=QUEUE_BATCH_SIZE)
+    last_user_id = None
+
+    while True:
+        batch = list(islice(details, QUEUE_BATCH_SIZE))
+
+        if len(batch) == 0:
+            break
+
+        Notification.enqueue(batch)
+
+        # Details come ordered by user, so only the last user of a batch can continue in the next one
+        progress.rows_scanned += len(batch)
+        progress.users += len(set([detail.assigned_budget.user_id for detail in batch]) - {last_user_id})
+        last_user_id = batch[-1].assigned_budget.user_id
+
+        logger.info("Notification shard %s progress: %s", shard, progress.as_dict)
+
+    progress.seconds = time.monotonic() - started_at
+    logger.info("Notification shard %s finished: %s", shard, progress.as_dict)
+
+    return progress
+
+
+def queue_shard_in_pool(shard, user_id_range, today):
+    # Pool threads and processes open their own database connections, closed once the shard is done
+    try:
+        return queue_shard(shard, user_id_range, today)
+    finally:
+        db.connections.close_all()
+
+
+def queue_in_shards(today, shards, workers, pool):
+    """
+    Queues the reminders of every user in id-range shards, processed by a
+    'thread' or 'process' pool of workers, or inline with a single worker.
+    Returns the ShardProgress of every shard.
+    """
+    user_id_ranges = user_id_shards(shards)
+
+    if workers <= 1:
+        return [queue_shard(shard, user_id_range, today) for shard, user_id_range in enumerate(user_id_ranges)]
+
+    if pool == 'thread':
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='notifications')
+    elif pool == 'process':
+        # Forked processes must not reuse the database connections of this one
+        db.connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+    else:
+        raise ValueError(f"Unknown notification pool {pool}. Use 'thread' or 'process'.")
+
+    with executor:
+        futures = [executor.submit(queue_shard_in_pool, shard, user_id_range, today) for shard, user_id_range in enumerate(user_id_ranges)]
+        return [future.result() for future in futures]
+
+
+def notify_expiration_expenses():
+    """
+    Queues a reminder for every future expense due in three days and returns
+    the rows scanned. notifications.dispatcher sends them.
+    """
+    print("Info: Users are notified...")
 
-                    if future_expense_detail.should_be_notified():
-                        string_email += '\n\n' + "-Nombre de gasto futuro:" + future_expense_detail.name + '\n\n' + 'Valor: ' + str(future_expense_detail.value) + '\n\n' + 'Fecha de vencimiento: ' + str(future_expense_detail.expiration_date) + '\n\n' + 'Categoría: ' + future_expense_detail.category.name
+    progress = queue_in_shards(
+        date.today(),
+        settings.NOTIFICATION_SHARDS,
+        settings.NOTIFICATION_WORKERS,
+        settings.NOTIFICATION_POOL
+    )
 
-                send_mail(
-                    '[IMPORTANTE] ¡ACUERDATE DE PAGAR!',
-                    string_email + '\n\n\n\n' + '¡Gracias por usar Walletify!',
-                    'notifications@walletify.com',
-                    [future_expense_detail.assigned_budget.user.email],
-                    fail_silently=False,
-                )
+    return {'rows_scanned': sum([shard_progress.rows_scanned for shard_progress in progress])}
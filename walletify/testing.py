@@ -0,0 +1,44 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from walletify import middleware
+
+
+class QueryCountTestCase(APITestCase):
+    """
+    Pins the SQL queries of the views. Each test sends the same request before
+    and after adding data, and both must run the same number of queries, up
+    to a maximum. A query that runs per expense, detail or budget fails it.
+    Requests go through the DEV authentication of the test environment.
+    """
+
+    DEV_USER_UID = 'randomrandomrandomrandomrand'
+    DEV_USER_EMAIL = 'random@random.com'
+
+    def setUp(self):
+        # Users cached by other tests may not exist in this one
+        middleware.CACHED_USERS.clear()
+
+    def count_queries(self, method, path, body=None):
+        """Sends the request and returns how many queries it ran. It must succeed."""
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method)(path, body, format='json')
+            # Streamed responses run their queries while they are read
+            b''.join(response.streaming_content) if response.streaming else response.content
+
+        self.assertLess(response.status_code, 400, response.content if not response.streaming else None)
+
+        return len(context)
+
+    def assertQueriesDoNotGrow(self, max_queries, count, grow):
+        """
+        count() sends a request and returns count_queries of it. It is called
+        once, then grow() adds data, and then it is called again.
+        """
+        queries_before = count()
+        grow()
+        queries_after = count()
+
+        self.assertEqual(queries_before, queries_after, f"Queries grew from {queries_before} to {queries_after} with the data")
+        self.assertLessEqual(queries_after, max_queries)
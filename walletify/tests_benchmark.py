@@ -0,0 +1,66 @@
+import json
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from budgets.models import Budget
+from categories.models import Category
+from expenses.models import Expense
+from users.models import User
+from walletify.benchmark import Benchmark, LocalTokenIssuer, percentile, regressions
+
+
+# Create your tests here.
+class TestBenchmark(TestCase):
+    def setUp(self):
+        a_category = Category.objects.all()[0]
+        self.users = []
+
+        for number in range(2):
+            user = User.objects.create(firebase_uid=f'randomrandomrandomrandomra{number:02d}', email=f'{number}@random.com')
+            Expense.objects.create(user=user, value=100, date=date.today(), category=a_category, name='An Expense')
+            budget = Budget.objects.create(user=user, initial_date=date.today(), final_date=date.today() + timedelta(days=30))
+            budget.add_future_expense(a_category, 100, 'Rent', date.today() + timedelta(days=3))
+            self.users.append(user)
+
+    def test_every_endpoint_is_driven_as_many_users(self):
+        with LocalTokenIssuer(key_size=1024) as token_issuer:
+            results = Benchmark(self.users, requests=4, concurrency=1, warmup=1, token_issuer=token_issuer).run()
+
+        self.assertEqual(results['authentication'], 'token')
+
+        for name, stats in results['endpoints'].items():
+            self.assertEqual(stats['errors'], 0, name)
+            self.assertGreater(stats['queries_mean'], 0, name)
+            self.assertGreater(stats['bytes_mean'], 0, name)
+
+        # Each user has one future expense to expend
+        self.assertEqual(results['endpoints']['budget_expended']['requests'], 2)
+        self.assertEqual(Expense.objects.filter(future_expense=True).count(), 2)
+
+    def test_command_writes_json_results(self):
+        stdout = StringIO()
+
+        call_command('benchmark_endpoints', '--auth', 'dev', '--requests', '3', '--concurrency', '1', '--endpoints', 'category', stdout=stdout, stderr=StringIO())
+
+        results = json.loads(stdout.getvalue())
+
+        self.assertEqual(list(results['endpoints']), ['category'])
+        self.assertEqual(results['endpoints']['category']['requests'], 3)
+
+    def test_percentiles_are_nearest_rank(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.50))
+
+    def test_slower_endpoints_and_extra_queries_are_regressions(self):
+        def results(p95_ms, queries_mean):
+            return {'endpoints': {'category': {'p95_ms': p95_ms, 'queries_mean': queries_mean, 'errors': 0}}}
+
+        self.assertEqual(regressions(results(10, 1), results(11, 1)), [])
+        self.assertEqual(len(regressions(results(10, 1), results(13, 1))), 1)
+        self.assertEqual(len(regressions(results(10, 1), results(10, 2))), 1)
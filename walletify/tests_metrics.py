@@ -0,0 +1,108 @@
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.test import override_settings
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from walletify import middleware, firebase_certs, scheduler
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+# Create your tests here.
+class TestRequestMetrics(APITestCase):
+    def setUp(self):
+        middleware.CACHED_USERS.clear()
+
+    def test_requests_are_counted_by_route_method_and_status(self):
+        requests = sample('walletify_http_requests_total', route='category', method='GET', status='200')
+        latencies = sample('walletify_http_request_duration_seconds_count', route='category', method='GET')
+        queries = sample('walletify_http_request_db_queries_sum', route='category', method='GET')
+
+        response = self.client.get('/category')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sample('walletify_http_requests_total', route='category', method='GET', status='200'), requests + 1)
+        self.assertEqual(sample('walletify_http_request_duration_seconds_count', route='category', method='GET'), latencies + 1)
+        self.assertGreater(sample('walletify_http_request_db_queries_sum', route='category', method='GET'), queries)
+
+    def test_token_cache_hits_and_misses_are_counted(self):
+        middleware.VERIFIED_TOKENS.clear()
+        hits, misses = sample('walletify_token_cache_lookups_total', result='hit'), sample('walletify_token_cache_lookups_total', result='miss')
+        claims = {'user_id': 'randomrandomrandomrandomrand', 'email': 'random@random.com', 'exp': 32503680000}
+
+        with mock.patch.object(firebase_certs, 'verify_id_token', return_value=claims):
+            for _ in range(3):
+                middleware.verify_token('a-token')
+
+        self.assertEqual(sample('walletify_token_cache_lookups_total', result='hit'), hits + 2)
+        self.assertEqual(sample('walletify_token_cache_lookups_total', result='miss'), misses + 1)
+
+
+class TestMetricsEndpoint(APITestCase):
+    def setUp(self):
+        os.environ["ENVIRONMENT"] = "PROD"
+
+    def tearDown(self):
+        os.environ["ENVIRONMENT"] = "DEV"
+
+    def test_metrics_are_served_without_a_firebase_token(self):
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'# TYPE walletify_http_requests_total counter', response.content)
+
+    @override_settings(METRICS_TOKEN='a-metrics-token')
+    def test_metrics_token_is_required_when_it_is_set(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer another-token').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer a-metrics-token').status_code, status.HTTP_200_OK)
+
+
+class TestJobMetrics(APITestCase):
+    def test_successful_run_reports_its_rows_and_emails(self):
+        runs = sample('walletify_job_runs_total', job='a-job', outcome='success')
+        rows = sample('walletify_job_rows_scanned_total', job='a-job')
+        emails = sample('walletify_job_emails_sent_total', job='a-job')
+
+        scheduler.run_job('a-job', lambda: {'rows_scanned': 3, 'emails_sent': 2})
+
+        self.assertEqual(sample('walletify_job_runs_total', job='a-job', outcome='success'), runs + 1)
+        self.assertEqual(sample('walletify_job_rows_scanned_total', job='a-job'), rows + 3)
+        self.assertEqual(sample('walletify_job_emails_sent_total', job='a-job'), emails + 2)
+        self.assertGreater(sample('walletify_job_duration_seconds_count', job='a-job'), 0)
+
+    def test_failed_run_is_counted_as_a_failure(self):
+        failures = sample('walletify_job_runs_total', job='a-failing-job', outcome='failure')
+
+        def fail():
+            raise RuntimeError('The job failed')
+
+        with self.assertRaises(RuntimeError):
+            scheduler.run_job('a-failing-job', fail)
+
+        self.assertEqual(sample('walletify_job_runs_total', job='a-failing-job', outcome='failure'), failures + 1)
+
+
+class TestMultiProcessMetrics(APITestCase):
+    def run_python(self, code, metrics_directory):
+        environment = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': metrics_directory}
+        return subprocess.run([sys.executable, '-c', code], env=environment, cwd=settings.BASE_DIR, capture_output=True, text=True, check=True).stdout
+
+    def test_metrics_of_every_process_are_added_up(self):
+        with tempfile.TemporaryDirectory() as metrics_directory:
+            for _ in range(2):
+                self.run_python("from walletify import metrics; metrics.REQUESTS.labels('category', 'GET', 200).inc()", metrics_directory)
+
+            exposition = self.run_python("from prometheus_client import generate_latest; from walletify import metrics; print(generate_latest(metrics.registry()).decode())", metrics_directory)
+
+        self.assertIn('walletify_http_requests_total{method="GET",route="category",status="200"} 2.0', exposition)
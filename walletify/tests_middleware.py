@@ -0,0 +1,183 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+import rsa
+from google.auth import crypt, jwt
+from firebase_admin._token_gen import ExpiredIdTokenError
+from firebase_admin._auth_utils import InvalidIdTokenError
+
+from django.conf import settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from walletify import middleware, firebase, firebase_certs
+from walletify.token_cache import VerifiedTokenCache
+from walletify.firebase_certs import CertificateStore, StaticCertificateSource, TokenVerifier
+
+
+# Create your tests here.
+class TestVerifiedTokenCache(APITestCase):
+    def setUp(self):
+        self.now = 1000
+        self.cache = VerifiedTokenCache(maxsize=2, timer=lambda: self.now)
+
+    def test_verified_token_is_cached_until_it_expires(self):
+        self.cache.put('a-token', {'user_id': 'a-user', 'exp': 1060})
+
+        self.assertEqual(self.cache.get('a-token')['user_id'], 'a-user')
+
+        self.now = 1060
+
+        self.assertIsNone(self.cache.get('a-token'))
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_least_recently_used_token_is_evicted(self):
+        self.cache.put('first-token', {'exp': 2000})
+        self.cache.put('second-token', {'exp': 2000})
+        self.cache.get('first-token')
+        self.cache.put('third-token', {'exp': 2000})
+
+        self.assertIsNotNone(self.cache.get('first-token'))
+        self.assertIsNone(self.cache.get('second-token'))
+        self.assertEqual(self.cache.stats['size'], 2)
+
+
+class TestCustomFirebaseAuthentication(APITestCase):
+    def setUp(self):
+        middleware.VERIFIED_TOKENS.clear()
+        os.environ["ENVIRONMENT"] = "PROD"
+
+    def tearDown(self):
+        os.environ["ENVIRONMENT"] = "DEV"
+
+    def test_same_token_is_verified_once(self):
+        claims = {'user_id': 'randomrandomrandomrandomrand', 'email': 'random@random.com', 'exp': 32503680000}
+
+        with mock.patch.object(firebase_certs, 'verify_id_token', return_value=claims) as verify_id_token:
+            for _ in range(3):
+                response = self.client.get('/category', HTTP_AUTHORIZATION='Bearer a-token')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(verify_id_token.call_count, 1)
+        self.assertEqual(middleware.VERIFIED_TOKENS.stats['hits'], 2)
+
+    def test_request_without_token_is_rejected(self):
+        response = self.client.get('/category')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TestLocalTokenVerification(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        public_key, private_key = rsa.newkeys(1024)
+        cls.signer = crypt.RSASigner.from_string(private_key.save_pkcs1(), key_id='stand-in-key')
+        cls.source = StaticCertificateSource({'stand-in-key': public_key.save_pkcs1().decode('ascii')})
+
+    def setUp(self):
+        self.verifier = TokenVerifier(CertificateStore(self.source), 'walletify-test')
+
+    def token(self, **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://securetoken.google.com/walletify-test',
+            'aud': 'walletify-test',
+            'sub': 'randomrandomrandomrandomrand',
+            'user_id': 'randomrandomrandomrandomrand',
+            'email': 'random@random.com',
+            'iat': now,
+            'exp': now + 3600
+        }
+        payload.update(claims)
+        return jwt.encode(self.signer, payload).decode('ascii')
+
+    def test_token_signed_with_known_key_is_verified(self):
+        claims = self.verifier.verify_id_token(self.token())
+
+        self.assertEqual(claims['uid'], 'randomrandomrandomrandomrand')
+        self.assertEqual(claims['email'], 'random@random.com')
+
+    def test_expired_token_is_rejected(self):
+        with self.assertRaises(ExpiredIdTokenError):
+            self.verifier.verify_id_token(self.token(iat=int(time.time()) - 7200, exp=int(time.time()) - 3600))
+
+    def test_token_of_another_project_is_rejected(self):
+        with self.assertRaises(InvalidIdTokenError):
+            self.verifier.verify_id_token(self.token(aud='another-project'))
+
+    def test_token_signed_with_unknown_key_is_rejected(self):
+        public_key, private_key = rsa.newkeys(1024)
+        self.signer, signer = crypt.RSASigner.from_string(private_key.save_pkcs1(), key_id='stand-in-key'), self.signer
+
+        try:
+            token = self.token()
+        finally:
+            self.signer = signer
+
+        with self.assertRaises(InvalidIdTokenError):
+            self.verifier.verify_id_token(token)
+
+    def test_certificates_are_read_from_disk_without_fetching_them(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = os.path.join(directory, 'certificates.json')
+            CertificateStore(self.source, cache_path=cache_path).refresh()
+
+            offline_source = mock.Mock()
+            store = CertificateStore(offline_source, cache_path=cache_path)
+
+            self.assertEqual(store.get(), self.source.certificates)
+            offline_source.fetch.assert_not_called()
+
+    def test_certificates_are_refreshed_before_they_expire(self):
+        now = 1000
+        store = CertificateStore(StaticCertificateSource({}, max_age=3600), refresh_margin=300, timer=lambda: now)
+        store.refresh()
+
+        self.assertEqual(store.seconds_until_refresh(), 3300)
+
+    def test_request_with_locally_verified_token(self):
+        firebase_certs.set_default_verifier(self.verifier)
+        middleware.VERIFIED_TOKENS.clear()
+        os.environ["ENVIRONMENT"] = "PROD"
+
+        try:
+            response = self.client.get('/category', HTTP_AUTHORIZATION='Bearer ' + self.token())
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.get('/category', HTTP_AUTHORIZATION='Bearer ' + self.token(aud='another-project'))
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        finally:
+            os.environ["ENVIRONMENT"] = "DEV"
+            firebase_certs.set_default_verifier(None)
+
+
+class TestLazyFirebaseApp(APITestCase):
+    def test_app_is_initialized_once_from_the_settings(self):
+        app = firebase.get_app()
+
+        self.assertIs(firebase.get_app(), app)
+        self.assertEqual(app.project_id, settings.FIREBASE_CONFIG_JSON['project_id'])
+        self.assertFalse(os.path.exists(os.path.join(settings.BASE_DIR, 'firebase-config.json')))
+
+
+class TestCustomUserCreation(APITestCase):
+    def setUp(self):
+        middleware.CACHED_USERS.clear()
+
+    def tearDown(self):
+        middleware.CACHED_USERS.clear()
+
+    def test_user_is_cached_once_it_is_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = middleware.resolve_user('randomrandomrandomrandomrand', 'random@random.com')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(middleware.resolve_user('randomrandomrandomrandomrand', 'random@random.com'), user)
+
+    def test_user_is_not_cached_before_it_is_committed(self):
+        middleware.resolve_user('randomrandomrandomrandomrand', 'random@random.com')
+
+        self.assertIsNone(middleware.CACHED_USERS.get('randomrandomrandomrandomrand'))
@@ -0,0 +1,83 @@
+import re
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from budgets.models import Budget, LimitDetail, FutureExpenseDetail
+from categories.models import Category
+from expenses.models import Expense, DailySpending
+from expenses.pagination import encode_cursor
+from notifications.models import Notification
+from users.models import User
+from walletify.tasks import future_expenses_to_notify
+
+
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)'),
+    'postgresql': re.compile(r'\bSeq Scan\b'),
+}
+
+
+# Create your tests here.
+class TestQueryPlans(TestCase):
+    """
+    Every hot query of expenses.views, budgets.models and walletify.tasks has
+    to be answered through an index. Plans are read with EXPLAIN, so a
+    dropped index or a query that stops matching one fails here.
+    """
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # PostgreSQL prefers a Seq Scan on tables as small as these ones. It is
+            # still chosen here when no index can answer the query. LOCAL ends it with
+            # the transaction of the test
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        self.a_user = User.objects.create(firebase_uid='randomrandomrandomrandomrand', email='random@random.com')
+        self.a_category = Category.objects.all()[0]
+        self.a_budget = Budget.objects.create(user=self.a_user, initial_date=date.today() - timedelta(days=30), final_date=date.today() + timedelta(days=335))
+
+        self.a_limit_detail = self.a_budget.add_limit(self.a_category, 1000)
+        self.an_expense = Expense.objects.create(user=self.a_user, value=100, date=date.today() - timedelta(days=20), category=self.a_category, name="An Expense")
+
+    def assertUsesIndexes(self, queryset, *index_names):
+        """Asserts the plan of the queryset has no full scan and goes through every index of index_names."""
+        plan = queryset.explain()
+        full_scan = FULL_SCAN_PATTERNS[connection.vendor]
+
+        self.assertIsNone(full_scan.search(plan), f"Full scan in the plan of {queryset.query}:\n{plan}")
+
+        for index_name in index_names:
+            self.assertIn(index_name, plan, f"{index_name} is not used by {queryset.query}")
+
+    def test_expense_queries_use_indexes(self):
+        a_date, another_date = date.today() - timedelta(days=30), date.today()
+
+        self.assertUsesIndexes(Expense.expenses_from_user(self.a_user))
+        self.assertUsesIndexes(Expense.expenses_after_cursor_from_user(self.a_user, encode_cursor(self.an_expense))[:10])
+        self.assertUsesIndexes(Expense.expenses_from_user(self.a_user).values('id', 'category__name'))
+        self.assertUsesIndexes(Expense.filter_within_timeline_from_user(self.a_user, a_date, another_date))
+        self.assertUsesIndexes(Expense.filter_by_category_within_timeline_from_user(self.a_user, a_date, another_date, self.a_category))
+
+    def test_budget_queries_use_indexes(self):
+        self.assertUsesIndexes(Budget.all_from_user(self.a_user))
+        self.assertUsesIndexes(Budget.objects.filter(user=self.a_user, initial_date__lte=date.today(), final_date__gte=date.today()))
+        self.assertUsesIndexes(self.a_budget.overlapping_budgets(exclude_self=True))
+        self.assertUsesIndexes(LimitDetail.objects.filter(assigned_budget=self.a_budget))
+        self.assertUsesIndexes(DailySpending.objects.filter(
+            user_id=self.a_user.id,
+            date__gte=self.a_budget.initial_date,
+            date__lte=self.a_budget.final_date,
+            category_id=self.a_category.id
+        ))
+
+    def test_notification_queries_use_indexes(self):
+        self.assertUsesIndexes(FutureExpenseDetail.to_notify_on(date.today()), 'future_expense_expiration_idx')
+        # The query of the notification job, with the budget, user and category joins
+        self.assertUsesIndexes(future_expenses_to_notify(date.today()), 'future_expense_expiration_idx')
+        self.assertUsesIndexes(future_expenses_to_notify(date.today(), (self.a_user.id, self.a_user.id + 1)), 'future_expense_expiration_idx')
+        self.assertUsesIndexes(FutureExpenseDetail.to_notify_on(date.today()).filter(assigned_budget=self.a_budget))
+        self.assertUsesIndexes(Notification.objects.filter(status=Notification.PENDING, next_attempt_at__lte=timezone.now()).order_by('next_attempt_at', 'id'))
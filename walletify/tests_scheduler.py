@@ -0,0 +1,45 @@
+from apscheduler.jobstores.memory import MemoryJobStore
+from django.test import TestCase
+
+from jobs.models import SchedulerLease
+from walletify.scheduler import LeaderScheduler
+
+
+# Create your tests here.
+class TestLeaderScheduler(TestCase):
+    def setUp(self):
+        self.schedulers_with_jobs = []
+
+        def add_jobs(scheduler):
+            self.schedulers_with_jobs.append(scheduler)
+
+        self.leader = LeaderScheduler(add_jobs, lease_name='a-lease', holder='a-process', jobstore_factory=MemoryJobStore)
+        self.standby = LeaderScheduler(add_jobs, lease_name='a-lease', holder='another-process', jobstore_factory=MemoryJobStore)
+
+    def tearDown(self):
+        self.leader.stop_jobs()
+        self.standby.stop_jobs()
+
+    def test_only_the_leader_runs_jobs(self):
+        self.assertTrue(self.leader.heartbeat())
+        self.assertFalse(self.standby.heartbeat())
+        self.assertTrue(self.leader.heartbeat())
+
+        self.assertTrue(self.leader.is_leader)
+        self.assertFalse(self.standby.is_leader)
+        self.assertEqual(len(self.schedulers_with_jobs), 1)
+
+    def test_standby_takes_over_a_stopped_leader(self):
+        self.leader.heartbeat()
+        self.leader.stop()
+
+        self.assertFalse(self.leader.is_leader)
+        self.assertTrue(self.standby.heartbeat())
+        self.assertTrue(self.standby.is_leader)
+
+    def test_leader_stops_jobs_when_its_lease_is_taken(self):
+        self.leader.heartbeat()
+        SchedulerLease.objects.filter(name='a-lease').update(holder='another-process')
+
+        self.assertFalse(self.leader.heartbeat())
+        self.assertFalse(self.leader.is_leader)
@@ -0,0 +1,53 @@
+import os
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from categories.models import Category
+from walletify import scheduler, server
+
+
+# Create your tests here.
+class TestWorkerWarmUp(TestCase):
+    def test_static_categories_are_cached_by_the_warm_up(self):
+        cache.delete(Category.catalog_key(None))
+        static_categories = Category.static_categories().count()
+
+        # Outside of a test the catalog is cached as soon as it is read
+        with self.captureOnCommitCallbacks(execute=True):
+            server.warm_up()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(Category.cached_catalog(None)), static_categories)
+
+    @override_settings(SCHEDULER_ENABLED=True)
+    def test_scheduler_is_started_by_the_workers_instead_of_the_preloading_process(self):
+        self.assertFalse(scheduler.should_start(['/usr/local/bin/gunicorn', '-c', 'gunicorn.conf.py', 'walletify.wsgi']))
+
+        with mock.patch.object(scheduler, 'start') as start:
+            server.after_fork()
+
+        start.assert_called_once_with()
+
+    @override_settings(SCHEDULER_ENABLED=True)
+    def test_scheduler_is_only_started_by_the_development_server(self):
+        self.assertFalse(scheduler.should_start(['manage.py', 'migrate']))
+        self.assertFalse(scheduler.should_start(['/usr/local/bin/pytest', '-q']))
+        self.assertFalse(scheduler.should_start(['a_script.py']))
+        self.assertTrue(scheduler.should_start(['manage.py', 'runserver', '--noreload']))
+
+        # The autoreloader runs the server in a child process with RUN_MAIN set
+        with mock.patch.dict(os.environ, {'RUN_MAIN': 'true'}):
+            self.assertTrue(scheduler.should_start(['manage.py', 'runserver']))
+
+        with mock.patch.dict(os.environ):
+            os.environ.pop('RUN_MAIN', None)
+            self.assertFalse(scheduler.should_start(['manage.py', 'runserver']))
+
+    @override_settings(SCHEDULER_ENABLED=False)
+    def test_disabled_scheduler_is_not_started_after_fork(self):
+        with mock.patch.object(scheduler, 'start') as start:
+            server.after_fork()
+
+        start.assert_not_called()
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from budgets.models import Budget
+from categories.models import Category
+from notifications.models import Notification
+from users.models import User
+from walletify.tasks import notify_expiration_expenses, queue_in_shards, user_id_shards
+
+
+# Create your tests here.
+@override_settings(NOTIFICATION_SHARDS=1, NOTIFICATION_WORKERS=1)
+class TestNotifyExpirationExpenses(TestCase):
+    def setUp(self):
+        self.due_date = date.today() + timedelta(days=3)
+        self.a_category = Category.objects.all()[0]
+
+    def create_current_budget_for(self, firebase_uid, email):
+        user = User.objects.create(firebase_uid=firebase_uid, email=email)
+        return Budget.objects.create(user=user, initial_date=date.today() - timedelta(days=10), final_date=date.today() + timedelta(days=30))
+
+    def test_each_user_gets_reminders_only_about_own_due_future_expenses(self):
+        a_budget = self.create_current_budget_for('randomrandomrandomrandomrand', 'random@random.com')
+        another_budget = self.create_current_budget_for('stalestalestalestalestalesta', 'stale@random.com')
+
+        a_budget.add_future_expense(self.a_category, 100, 'Rent', self.due_date)
+        a_budget.add_future_expense(self.a_category, 200, 'Gas Bill', self.due_date)
+        a_budget.add_future_expense(self.a_category, 300, 'Not Due Yet', self.due_date + timedelta(days=1))
+        another_budget.add_future_expense(self.a_category, 400, 'Water Bill', self.due_date)
+
+        expended = another_budget.add_future_expense(self.a_category, 500, 'Already Paid', self.due_date)
+        expended.expended = True
+        expended.save()
+
+        # One query reads the due future expenses and another one queues them
+        with self.assertNumQueries(2):
+            self.assertEqual(notify_expiration_expenses(), {'rows_scanned': 3})
+
+        queued = {(notification.email, notification.name) for notification in Notification.objects.all()}
+
+        self.assertEqual(queued, {('random@random.com', 'Rent'), ('random@random.com', 'Gas Bill'), ('stale@random.com', 'Water Bill')})
+
+    def test_rerun_does_not_queue_reminders_twice(self):
+        a_budget = self.create_current_budget_for('randomrandomrandomrandomrand', 'random@random.com')
+        a_budget.add_future_expense(self.a_category, 100, 'Rent', self.due_date)
+
+        notify_expiration_expenses()
+        notify_expiration_expenses()
+
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_no_reminder_is_queued_without_due_future_expenses(self):
+        self.create_current_budget_for('randomrandomrandomrandomrand', 'random@random.com')
+
+        self.assertEqual(notify_expiration_expenses(), {'rows_scanned': 0})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_users_are_split_in_id_range_shards(self):
+        users = [User.objects.create(firebase_uid=f'randomrandomrandomrandomra{number:02d}', email=f'{number}@random.com') for number in range(10)]
+        first_id, last_id = users[0].id, users[-1].id
+
+        self.assertEqual(user_id_shards(1), [(None, None)])
+        self.assertEqual(user_id_shards(3), [(first_id, first_id + 4), (first_id + 4, first_id + 8), (first_id + 8, last_id + 1)])
+
+
+class TestShardedNotifications(TransactionTestCase):
+    # Pool threads open their own database connections, so the data has to be committed
+    serialized_rollback = True
+
+    def test_thread_pool_queues_a_reminder_for_every_user(self):
+        a_category = Category.objects.all()[0]
+        due_date = date.today() + timedelta(days=3)
+
+        for number in range(5):
+            user = User.objects.create(firebase_uid=f'randomrandomrandomrandomra{number:02d}', email=f'{number}@random.com')
+            budget = Budget.objects.create(user=user, initial_date=date.today(), final_date=date.today() + timedelta(days=30))
+            budget.add_future_expense(a_category, 100, 'Rent', due_date)
+
+        progress = queue_in_shards(date.today(), shards=3, workers=2, pool='thread')
+
+        self.assertEqual([shard_progress.shard for shard_progress in progress], [0, 1, 2])
+        self.assertEqual(sum([shard_progress.users for shard_progress in progress]), 5)
+        self.assertEqual(sorted(Notification.objects.values_list('email', flat=True)), [f'{number}@random.com' for number in range(5)])
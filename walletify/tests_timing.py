@@ -0,0 +1,95 @@
+import json
+import os
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from walletify import middleware, firebase_certs
+from walletify.timing import RequestTimings
+
+
+def metrics_of(response):
+    """Server-Timing metrics of the response by name, with their parameters."""
+    metrics = {}
+
+    for metric in response['Server-Timing'].split(', '):
+        name, *parameters = metric.split(';')
+        metrics[name] = dict(parameter.split('=', 1) for parameter in parameters)
+
+    return metrics
+
+
+# Create your tests here.
+class TestRequestTimings(APITestCase):
+    def setUp(self):
+        self.now = 0
+        self.timings = RequestTimings(timer=lambda: self.now)
+
+    def test_serialization_is_not_counted_as_view_time(self):
+        self.timings.start_view()
+        self.now = 0.010
+
+        with self.timings.measure('serialize'):
+            self.now = 0.014
+
+        self.timings.finish_view()
+        self.timings.finish()
+
+        self.assertEqual(self.timings.durations, {'serialize': 4.0, 'view': 10.0, 'total': 14.0})
+
+    def test_database_metric_describes_the_query_count(self):
+        for _ in range(3):
+            self.timings.execute_wrapper(lambda *args: None, 'SELECT 1', None, False, {})
+
+        self.timings.finish()
+
+        self.assertIn('db;dur=0;desc="Database (3 queries)"', self.timings.server_timing)
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+class TestRequestTiming(APITestCase):
+    def setUp(self):
+        middleware.CACHED_USERS.clear()
+
+    def test_sampled_request_reports_every_span(self):
+        with self.assertLogs('walletify.timing', level='INFO') as logs:
+            response = self.client.post('/expense/filter', {'timeline': ['2023-01-01', '2023-01-31']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(metrics_of(response)), {'user', 'body', 'db', 'view', 'serialize', 'total'})
+
+        line = json.loads(logs.records[0].getMessage())
+
+        self.assertEqual((line['method'], line['path'], line['status']), ('POST', '/expense/filter', 200))
+        self.assertEqual(set(line['timings_ms']), set(metrics_of(response)))
+        self.assertGreater(line['db_queries'], 0)
+        self.assertIsNotNone(line['user_id'])
+
+    def test_rendering_of_drf_responses_is_measured(self):
+        response = self.client.get('/category')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('serialize', metrics_of(response))
+
+    def test_token_verification_is_measured(self):
+        middleware.VERIFIED_TOKENS.clear()
+        claims = {'user_id': 'randomrandomrandomrandomrand', 'email': 'random@random.com', 'exp': 32503680000}
+        os.environ["ENVIRONMENT"] = "PROD"
+
+        try:
+            with mock.patch.object(firebase_certs, 'verify_id_token', return_value=claims):
+                response = self.client.get('/category', HTTP_AUTHORIZATION='Bearer a-token')
+        finally:
+            os.environ["ENVIRONMENT"] = "DEV"
+
+        self.assertIn('auth', metrics_of(response))
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_request_out_of_the_sample_is_not_reported(self):
+        with self.assertNoLogs('walletify.timing', level='INFO'):
+            response = self.client.get('/category')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('Server-Timing'))
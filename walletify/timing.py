@@ -0,0 +1,186 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from django import http
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being handled, for code that has no access to it
+current_timings = ContextVar('request_timings', default=None)
+
+SPAN_DESCRIPTIONS = {
+    'auth': 'Token verification',
+    'user': 'User resolution',
+    'body': 'Body parsing',
+    'db': 'Database',
+    'view': 'View',
+    'serialize': 'Serialization',
+    'total': 'Total',
+}
+
+
+class RequestTimings:
+    """Wall time spent in each part of a request, and the count and time of its database queries."""
+
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        self.started_at = timer()
+        self.spans = {}
+        self.queries = 0
+        self.view_started_at = None
+        self.view_seconds = None
+        self.total_seconds = None
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0) + seconds
+
+    @contextmanager
+    def measure(self, name):
+        started_at = self.timer()
+
+        try:
+            yield
+        finally:
+            self.add(name, self.timer() - started_at)
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        self.queries += 1
+
+        with self.measure('db'):
+            return execute(sql, params, many, context)
+
+    def start_view(self):
+        self.view_started_at = self.timer()
+
+    def finish_view(self):
+        if self.view_started_at is not None and self.view_seconds is None:
+            self.view_seconds = self.timer() - self.view_started_at
+
+    def finish(self):
+        self.total_seconds = self.timer() - self.started_at
+
+    @property
+    def durations(self):
+        """Milliseconds of every span. JSON encoding happens inside the views, so it is not counted as view time."""
+        durations = dict(self.spans)
+
+        if self.view_seconds is not None:
+            durations['view'] = max(self.view_seconds - self.spans.get('serialize', 0), 0)
+
+        if self.total_seconds is not None:
+            durations['total'] = self.total_seconds
+
+        return {name: round(seconds * 1000, 3) for name, seconds in durations.items()}
+
+    @property
+    def server_timing(self):
+        metrics = []
+
+        for name, milliseconds in self.durations.items():
+            description = SPAN_DESCRIPTIONS.get(name, name)
+
+            if name == 'db':
+                description += f' ({self.queries} queries)'
+
+            metrics.append(f'{name};dur={milliseconds};desc="{description}"')
+
+        return ', '.join(metrics)
+
+
+def measure(request, name):
+    """Measures a span of the request when it is sampled, and does nothing otherwise."""
+    timings = request.META.get('timings')
+    return timings.measure(name) if timings is not None else nullcontext()
+
+
+class JsonResponse(http.JsonResponse):
+    """django.http.JsonResponse that adds the time spent encoding its data to the serialize span."""
+
+    def __init__(self, *args, **kwargs):
+        timings = current_timings.get()
+
+        with timings.measure('serialize') if timings is not None else nullcontext():
+            super().__init__(*args, **kwargs)
+
+
+class RequestTiming:
+    """
+    Outermost middleware. For a sample of the requests, set by
+    REQUEST_TIMING_SAMPLE_RATE, it keeps a RequestTimings in
+    request.META['timings'] that the other middleware and the views fill,
+    counts and times every database query, and reports all of it in a
+    Server-Timing header and a JSON log line.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        request.META['timings'] = timings
+        token = current_timings.set(timings)
+
+        try:
+            with connection.execute_wrapper(timings.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        timings.finish()
+        response['Server-Timing'] = timings.server_timing
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': getattr(request.META.get('user'), 'id', None),
+            'db_queries': timings.queries,
+            'timings_ms': timings.durations,
+        }))
+
+        return response
+
+
+class ViewTiming:
+    """
+    Innermost middleware. Measures the view from the end of the process_view
+    hooks until it returns, and the rendering of DRF responses after it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        timings = request.META.get('timings')
+
+        if timings is not None:
+            timings.finish_view()
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = request.META.get('timings')
+
+        if timings is not None:
+            timings.start_view()
+
+        return None
+
+    def process_template_response(self, request, response):
+        timings = request.META.get('timings')
+
+        if timings is not None:
+            timings.finish_view()
+            rendering_started_at = timings.timer()
+            response.add_post_render_callback(lambda rendered: timings.add('serialize', timings.timer() - rendering_started_at))
+
+        return response
@@ -0,0 +1,55 @@
+import hashlib
+import threading
+import time
+
+from cachetools import TLRUCache
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of decoded Firebase ID tokens that were already verified.
+
+    Entries are keyed by the SHA-256 of the token, so raw tokens are never kept
+    in memory, and each one expires at the 'exp' claim of its own token.
+    """
+
+    def __init__(self, maxsize, timer=time.time):
+        self.tokens = TLRUCache(maxsize=maxsize, ttu=lambda key, claims, now: claims['exp'], timer=timer)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_of(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        with self.lock:
+            claims = self.tokens.get(self.key_of(token))
+
+            if claims is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+            return claims
+
+    def put(self, token, claims):
+        with self.lock:
+            self.tokens[self.key_of(token)] = claims
+
+    def clear(self):
+        with self.lock:
+            self.tokens.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self):
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.tokens),
+                'maxsize': self.tokens.maxsize
+            }
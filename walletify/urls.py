@@ -19,6 +19,8 @@ from django.urls import path, include
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from walletify.metrics import metrics
+
 schema_view = get_schema_view(
    openapi.Info(
       title="Walletify API",
@@ -34,6 +36,7 @@ urlpatterns = [
     path('expense', include('expenses.urls')),
     path('category', include('categories.urls')),
     path('budget', include('budgets.urls')),
+    path('metrics', metrics, name='metrics'),
     #re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     #re_path(r'^swagger/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     #re_path(r'^redoc/$', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),